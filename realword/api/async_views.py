@@ -0,0 +1,335 @@
+"""Async versions of the hot read endpoints, for deployments served through
+ASGI (realword.asgi). With ASYNC_READ_VIEWS enabled, api.urls routes GET
+requests of these endpoints here and every other method to the DRF views.
+With ASYNC_AUTH_VIEWS enabled, JSON POST requests of the login and
+registration endpoints are routed here too, and hash passwords through
+api.hashers.offload().
+
+The responses are the same as the DRF views'. Everything a serializer needs
+is loaded with annotated querysets up front, so rendering never touches the
+database from the event loop.
+"""
+
+import asyncio
+import io
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+
+from .authentication import StatelessJWTAuthentication, inactive_users
+from .cache import (
+    aget_article_detail,
+    aget_profile,
+    get_articles_count,
+    set_article_detail,
+)
+from .hashers import offload
+from .models import FollowingUser, Article, Comment
+from .conditional import (
+    ARTICLE_VALIDATOR_FIELDS,
+    COMMENT_VALIDATOR_FIELDS,
+    article_validator,
+    comment_validator,
+    has_validators,
+    make_etag,
+    not_modified,
+    set_etag,
+)
+from .pagination import cursor_page, get_article_ordering, split_page
+from .serializers import (
+    LoginSerializer,
+    UserSerializer,
+    ProfileSerializer,
+    ArticleSerializer,
+    CommentSerializer,
+    get_article_list_serializer,
+)
+from .views import ArticleView, CommentView
+
+# The JSON renderer and parser configured for the DRF views.
+renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+parser = api_settings.DEFAULT_PARSER_CLASSES[0]()
+authenticator = StatelessJWTAuthentication()
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        renderer.render(data), status=status_code, content_type=renderer.media_type
+    )
+
+
+def render_exception(exc):
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+
+    response = render(data, status_code=exc.status_code)
+
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response["WWW-Authenticate"] = authenticator.authenticate_header(None)
+
+    return response
+
+
+async def authenticate(request):
+    if inactive_users.is_stale():
+        await inactive_users.arefresh()
+
+    result = authenticator.authenticate(request)
+
+    return result[0] if result else AnonymousUser()
+
+
+def async_api_view(authentication_required=False):
+    """Authenticate the request like the DRF views do, pass the user to the
+    view and turn API exceptions into the same error responses."""
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                request.user = await authenticate(request)
+
+                if authentication_required and not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return render_exception(exc)
+
+        return wrapper
+
+    return decorator
+
+
+def _route(view, async_view, accepts):
+    sync_view = sync_to_async(view)
+
+    async def dispatch(request, *args, **kwargs):
+        if accepts(request):
+            return await async_view(request, *args, **kwargs)
+
+        return await sync_view(request, *args, **kwargs)
+
+    dispatch.csrf_exempt = True
+
+    return dispatch
+
+
+def with_async_get(view, async_get):
+    """Route GET requests to `async_get` and everything else to the sync
+    `view`, when ASYNC_READ_VIEWS is enabled."""
+    if not getattr(settings, "ASYNC_READ_VIEWS", False):
+        return view
+
+    return _route(view, async_get, lambda request: request.method == "GET")
+
+
+def with_async_post(view, async_post):
+    """Route POST requests with a JSON body to `async_post` and everything
+    else to the sync `view`, when ASYNC_AUTH_VIEWS is enabled."""
+    if not getattr(settings, "ASYNC_AUTH_VIEWS", False):
+        return view
+
+    return _route(
+        view,
+        async_post,
+        lambda request: request.method == "POST"
+        and request.content_type == parser.media_type,
+    )
+
+
+def parse(request):
+    if not request.body:
+        return {}
+
+    return parser.parse(
+        io.BytesIO(request.body),
+        parser.media_type,
+        {"encoding": request.encoding or settings.DEFAULT_CHARSET},
+    )
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+@async_api_view()
+async def article_list(request):
+    filters = {
+        "tag": request.GET.get("tag"),
+        "author": request.GET.get("author"),
+        "favorited": request.GET.get("favorited"),
+    }
+    limit = int(request.GET.get("limit", ArticleView.article_limit))
+    cursor = request.GET.get("cursor")
+
+    serializer_class = get_article_list_serializer(request.GET)
+
+    queryset = Article.objects.for_list(request.user).filter_by(**filters)
+    queryset = queryset.order_by(*get_article_ordering(request.GET))
+
+    if "body" not in serializer_class.Meta.fields:
+        queryset = queryset.defer("body")
+
+    if cursor is None:
+        offset = int(request.GET.get("offset", ArticleView.article_offset))
+        page_queryset = queryset[offset : limit + offset]
+    else:
+        page_queryset = cursor_page(queryset, cursor, limit)
+
+    count = sync_to_async(get_articles_count)(
+        Article.objects.filter_by(**filters), **filters
+    )
+
+    if has_validators(request):
+        validators, articles_count = await asyncio.gather(
+            _list(page_queryset.values_list(*ARTICLE_VALIDATOR_FIELDS)), count
+        )
+        has_next = cursor is not None and len(validators) > limit
+        etag = make_etag(validators[:limit], has_next, articles_count)
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        rows = await _list(page_queryset)
+    else:
+        rows, articles_count = await asyncio.gather(_list(page_queryset), count)
+
+    if cursor is None:
+        page, next_cursor = rows, None
+    else:
+        page, next_cursor = split_page(rows, limit)
+
+    etag = make_etag(
+        [article_validator(article) for article in page],
+        next_cursor is not None,
+        articles_count,
+    )
+    serializer = serializer_class(page, many=True, context={"request": request})
+    data = {"articles": serializer.data, "articlesCount": articles_count}
+
+    if cursor is not None:
+        data["nextCursor"] = next_cursor
+
+    return set_etag(render(data), etag)
+
+
+@async_api_view()
+async def article_detail(request, slug):
+    data = await aget_article_detail(slug, request.user)
+
+    if data is None:
+        try:
+            article = await Article.objects.for_list(request.user).aget(slug=slug)
+        except Article.DoesNotExist:
+            raise exceptions.NotFound()
+
+        data = ArticleSerializer(article, context={"request": request}).data
+        await sync_to_async(set_article_detail)(article, data)
+
+    etag = make_etag(data)
+    response = not_modified(request, etag) or render({"article": data})
+
+    return set_etag(response, etag)
+
+
+@async_api_view(authentication_required=True)
+async def profile_detail(request, username):
+    profile = await aget_profile(username)
+
+    if profile is None:
+        raise exceptions.NotFound()
+
+    profile.is_followed = await FollowingUser.objects.filter(
+        user=request.user, following=profile
+    ).aexists()
+    serializer = ProfileSerializer(profile, context={"request": request})
+    etag = make_etag(serializer.data)
+    response = not_modified(request, etag) or render({"profile": serializer.data})
+
+    return set_etag(response, etag)
+
+
+@async_api_view(authentication_required=True)
+async def comment_list(request, slug):
+    limit = int(request.GET.get("limit", CommentView.comment_limit))
+    cursor = request.GET.get("cursor")
+
+    queryset = Comment.objects.for_list(request.user).filter(article__slug=slug)
+    queryset = queryset.order_by("createdAt", "id")
+
+    if cursor is None:
+        page_queryset = queryset
+    else:
+        page_queryset = cursor_page(queryset, cursor, limit, descending=False)
+
+    if has_validators(request):
+        validators = await _list(page_queryset.values_list(*COMMENT_VALIDATOR_FIELDS))
+        has_next = cursor is not None and len(validators) > limit
+
+        if validators:
+            response = not_modified(request, make_etag(validators[:limit], has_next))
+            if response is not None:
+                return response
+
+    if cursor is None:
+        comments, next_cursor = await _list(page_queryset), None
+    else:
+        comments, next_cursor = split_page(await _list(page_queryset), limit)
+
+    if not comments and not await Article.objects.filter(slug=slug).aexists():
+        raise exceptions.NotFound()
+
+    etag = make_etag(
+        [comment_validator(comment) for comment in comments],
+        next_cursor is not None,
+    )
+    serializer = CommentSerializer(comments, many=True, context={"request": request})
+    data = {"comments": serializer.data}
+
+    if cursor is not None:
+        data["nextCursor"] = next_cursor
+
+    return set_etag(render(data), etag)
+
+
+@async_api_view()
+async def register(request):
+    data = parse(request).get("user", {})
+
+    def create():
+        serializer = UserSerializer(data=data)
+
+        if serializer.is_valid():
+            serializer.save()
+
+            return {"user": serializer.data}, status.HTTP_201_CREATED
+
+        return {"user": serializer.errors}, status.HTTP_400_BAD_REQUEST
+
+    return render(*await offload(create))
+
+
+@async_api_view()
+async def login(request):
+    data = parse(request).get("user", {})
+
+    def authenticate_user():
+        serializer = LoginSerializer(data=data)
+
+        if serializer.is_valid():
+            user = UserSerializer(serializer.validated_data["user"])
+
+            return {"user": user.data}, status.HTTP_200_OK
+
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+
+    return render(*await offload(authenticate_user))
@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .profiling import timer
+
+
+class InactiveUsers:
+    """Per-process set of deactivated user ids, reloaded from the database
+    at most every STATELESS_AUTH_DENYLIST_TIMEOUT seconds."""
+
+    def __init__(self):
+        self.user_ids = set()
+        self.expires = 0
+
+    def get_queryset(self):
+        return User.objects.filter(is_active=False).values_list("pk", flat=True)
+
+    def set_user_ids(self, user_ids):
+        self.user_ids = user_ids
+        self.expires = time.monotonic() + getattr(
+            settings, "STATELESS_AUTH_DENYLIST_TIMEOUT", 30
+        )
+
+    def is_stale(self):
+        return self.expires <= time.monotonic()
+
+    def refresh(self):
+        self.set_user_ids(set(self.get_queryset()))
+
+    async def arefresh(self):
+        self.set_user_ids({pk async for pk in self.get_queryset()})
+
+    def update(self, user):
+        if user.is_active:
+            self.user_ids.discard(user.pk)
+        else:
+            self.user_ids.add(user.pk)
+
+    def __contains__(self, user_id):
+        if self.is_stale():
+            self.refresh()
+
+        return user_id in self.user_ids
+
+
+inactive_users = InactiveUsers()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication that does not load the user from the database.
+
+    request.user is a User carrying only the id from the token, the other
+    fields are deferred and loaded together on first access (see
+    User.refresh_from_db), so views that only filter by the user never
+    query it. Deactivated users are rejected through `inactive_users`.
+    """
+
+    @timer("auth")
+    def authenticate(self, request):
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = User._meta.pk.to_python(
+                validated_token[api_settings.USER_ID_CLAIM]
+            )
+        except (KeyError, ValidationError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if user_id in inactive_users:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        user = User.from_db(router.db_for_read(User), ["id"], [user_id])
+        user._from_token = True
+
+        return user
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Tag, Article, User
+
+ARTICLES_COUNT_VERSION_KEY = "articles_count:version"
+FAVORITED_COUNT_VERSION_KEY = "articles_count:version:favorited:{}"
+ARTICLE_DETAIL_KEY = "article_detail:{}"
+ARTICLE_AUTHOR_KEY = "article_detail:author:{}"
+PROFILE_KEY = "profile:{}"
+PROFILE_FIELDS = ("id", "username", "bio", "image")
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+
+    # Versions start from the current time rather than 0, so a version key
+    # evicted from the cache can never resurrect counts stored under it.
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def bump_articles_count_version():
+    cache.set(ARTICLES_COUNT_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_favorited_count_version(user_id):
+    cache.set(FAVORITED_COUNT_VERSION_KEY.format(user_id), time.time_ns(), timeout=None)
+
+
+def _estimate_count(queryset):
+    """Return the planner's row estimate for a queryset, or None when the
+    database backend cannot provide one cheaply."""
+    if connection.vendor != "postgresql":
+        return None
+
+    plan = json.loads(queryset.explain(format="json"))
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_articles_count(queryset, tag=None, author=None, favorited=None):
+    """Return the number of articles in a filtered (unsliced) queryset.
+
+    The count is computed once per distinct filter and cached. Every article
+    write invalidates all cached counts, favorite changes only invalidate
+    counts filtered by the user who favorited. When
+    ARTICLES_COUNT_APPROXIMATE_THRESHOLD is set and the database can estimate
+    it, sets larger than the threshold report the estimate instead.
+    """
+    version_keys = [ARTICLES_COUNT_VERSION_KEY]
+    if favorited:
+        # Versioned by user id, favorite writes only know the id of users
+        # authenticated from a token.
+        user = get_profile(favorited)
+        if user is not None:
+            version_keys.append(FAVORITED_COUNT_VERSION_KEY.format(user.pk))
+
+    versions = _get_versions(version_keys)
+    filters = json.dumps([tag, author, favorited])
+    key = "articles_count:{}:{}".format(
+        ":".join(str(version) for version in versions),
+        hashlib.md5(filters.encode()).hexdigest(),
+    )
+
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    threshold = getattr(settings, "ARTICLES_COUNT_APPROXIMATE_THRESHOLD", None)
+    if threshold is not None:
+        estimate = _estimate_count(queryset)
+
+        if estimate is not None and estimate > threshold:
+            count = estimate
+
+    if count is None:
+        count = queryset.count()
+
+    cache.set(key, count, getattr(settings, "ARTICLES_COUNT_CACHE_TIMEOUT", 60))
+
+    return count
+
+
+def _article_detail_key(slug):
+    return ARTICLE_DETAIL_KEY.format(hashlib.md5(slug.encode()).hexdigest())
+
+
+def set_article_detail(article, data):
+    """Cache the rendered article detail `data` of `article`.
+
+    The article and its author profile are stored under separate keys, the
+    slug and the author id, so profile changes do not have to find every
+    article of the author. The viewer dependent `favorited` and `following`
+    values are replaced on every read.
+    """
+    data = dict(data)
+    profile = dict(data["author"])
+    timeout = getattr(settings, "ARTICLE_DETAIL_CACHE_TIMEOUT", 300)
+
+    cache.set_many(
+        {
+            _article_detail_key(article.slug): {
+                "pk": article.pk,
+                "author_id": article.author_id,
+                "article": data,
+            },
+            ARTICLE_AUTHOR_KEY.format(article.author_id): profile,
+        },
+        timeout,
+    )
+
+
+def _get_article_detail(slug):
+    entry = cache.get(_article_detail_key(slug))
+    if entry is None:
+        return None
+
+    profile = cache.get(ARTICLE_AUTHOR_KEY.format(entry["author_id"]))
+    if profile is None:
+        return None
+
+    return entry, profile
+
+
+async def _aget_article_detail(slug):
+    entry = await cache.aget(_article_detail_key(slug))
+    if entry is None:
+        return None
+
+    profile = await cache.aget(ARTICLE_AUTHOR_KEY.format(entry["author_id"]))
+    if profile is None:
+        return None
+
+    return entry, profile
+
+
+def _render_article_detail(entry, profile, flags):
+    favorited, following = flags
+
+    data = dict(entry["article"])
+    data["favorited"] = favorited
+    data["author"] = dict(profile, following=following)
+
+    return data
+
+
+def _viewer_flags(entry, user):
+    return (
+        Article.objects.filter(pk=entry["pk"])
+        .for_list(user)
+        .values_list("is_favorited", "is_following_author")
+    )
+
+
+def get_article_detail(slug, user):
+    """Return the cached article detail data for `user`, or None on a miss.
+
+    Only the viewer's favorited and following flags are read from the
+    database, in one query, and none for anonymous users.
+    """
+    cached = _get_article_detail(slug)
+    if cached is None:
+        return None
+
+    entry, profile = cached
+    flags = (False, False)
+
+    if user.is_authenticated:
+        flags = _viewer_flags(entry, user).first()
+
+        if flags is None:
+            return None
+
+    return _render_article_detail(entry, profile, flags)
+
+
+async def aget_article_detail(slug, user):
+    cached = await _aget_article_detail(slug)
+    if cached is None:
+        return None
+
+    entry, profile = cached
+    flags = (False, False)
+
+    if user.is_authenticated:
+        flags = await _viewer_flags(entry, user).afirst()
+
+        if flags is None:
+            return None
+
+    return _render_article_detail(entry, profile, flags)
+
+
+def invalidate_article_detail(*slugs):
+    cache.delete_many([_article_detail_key(slug) for slug in slugs if slug])
+
+
+def invalidate_article_author(user_id):
+    cache.delete(ARTICLE_AUTHOR_KEY.format(user_id))
+
+
+def _profile_key(username):
+    return PROFILE_KEY.format(hashlib.md5(username.casefold().encode()).hexdigest())
+
+
+def _profile_user(data):
+    # Only the public fields are cached, the others load on access.
+    fields = [f.attname for f in User._meta.concrete_fields if f.attname in data]
+
+    return User.from_db(None, fields, [data[field] for field in fields])
+
+
+def _profile_queryset(username):
+    return User.objects.filter(username_lookup=username.casefold()).values(
+        *PROFILE_FIELDS
+    )
+
+
+def get_profile(username):
+    """Return the user with `username`, compared case-insensitively, or
+    None.
+
+    The public profile fields are read through the cache, the rest of the
+    user is deferred. Missing users are not cached, so a registration does
+    not have to invalidate anything.
+    """
+    key = _profile_key(username)
+    data = cache.get(key)
+
+    if data is None:
+        data = _profile_queryset(username).first()
+        if data is None:
+            return None
+
+        cache.set(key, data, getattr(settings, "PROFILE_CACHE_TIMEOUT", 300))
+
+    return _profile_user(data)
+
+
+async def aget_profile(username):
+    key = _profile_key(username)
+    data = await cache.aget(key)
+
+    if data is None:
+        data = await _profile_queryset(username).afirst()
+        if data is None:
+            return None
+
+        await cache.aset(key, data, getattr(settings, "PROFILE_CACHE_TIMEOUT", 300))
+
+    return _profile_user(data)
+
+
+def invalidate_profile(*usernames):
+    cache.delete_many([_profile_key(username) for username in usernames])
+
+
+# Per-process, the tag cloud is requested on every page load of the frontend
+# and tolerates being a little behind.
+_popular_tags = {}
+
+
+def get_popular_tags():
+    now = time.monotonic()
+
+    if _popular_tags.get("expires", 0) <= now:
+        _popular_tags["tags"] = list(
+            Tag.objects.filter(articles_count__gt=0)
+            .order_by("-articles_count", "name")
+            .values_list("name", flat=True)[
+                : getattr(settings, "POPULAR_TAGS_LIMIT", 20)
+            ]
+        )
+        _popular_tags["expires"] = now + getattr(
+            settings, "POPULAR_TAGS_CACHE_TIMEOUT", 60
+        )
+
+    return _popular_tags["tags"]
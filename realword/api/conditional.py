@@ -0,0 +1,91 @@
+"""ETag validators for conditional GET on the read endpoints.
+
+Favorites, follows and profile edits change responses without touching any
+updatedAt, so the list validators hash a narrow projection of the page rows
+(ids, timestamps, counters, viewer flags and author profile) instead of a
+max(updatedAt). The projection is a cheap query without the article bodies,
+and the same tuples can be built from the loaded rows of a 200 response.
+"""
+
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+ARTICLE_VALIDATOR_FIELDS = (
+    "pk",
+    "updatedAt",
+    "favorites_count",
+    "is_favorited",
+    "is_following_author",
+    "author__username",
+    "author__bio",
+    "author__image",
+)
+COMMENT_VALIDATOR_FIELDS = (
+    "pk",
+    "updatedAt",
+    "is_following_author",
+    "author__username",
+    "author__bio",
+    "author__image",
+)
+
+
+def article_validator(article):
+    """The ARTICLE_VALIDATOR_FIELDS of an Article.objects.for_list() row."""
+    author = article.author
+
+    return (
+        article.pk,
+        article.updatedAt,
+        article.favorites_count,
+        article.is_favorited,
+        article.is_following_author,
+        author.username,
+        author.bio,
+        author.image,
+    )
+
+
+def comment_validator(comment):
+    """The COMMENT_VALIDATOR_FIELDS of a Comment.objects.for_list() row."""
+    author = comment.author
+
+    return (
+        comment.pk,
+        comment.updatedAt,
+        comment.is_following_author,
+        author.username,
+        author.bio,
+        author.image,
+    )
+
+
+def make_etag(*parts):
+    payload = json.dumps(parts, default=str)
+
+    return 'W/"{}"'.format(hashlib.md5(payload.encode()).hexdigest())
+
+
+def has_validators(request):
+    return "HTTP_IF_NONE_MATCH" in request.META
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the request's If-None-Match matches `etag`,
+    None otherwise."""
+    response = get_conditional_response(request, etag=etag)
+
+    if response is not None:
+        set_etag(response, etag)
+
+    return response
+
+
+def set_etag(response, etag):
+    response["ETag"] = etag
+    # The viewer's flags are part of every validator.
+    patch_vary_headers(response, ["Authorization"])
+
+    return response
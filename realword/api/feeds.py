@@ -0,0 +1,169 @@
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils.module_loading import import_string
+
+from .models import FollowingUser, Article, TimelineEntry
+from .pagination import filter_after_cursor
+
+
+def get_feed():
+    return import_string(getattr(settings, "FEED_STRATEGY", "api.feeds.PullFeed"))()
+
+
+class PullFeed:
+    """Read the feed straight from the followed authors' articles, served by
+    the (author, createdAt) index. Nothing has to be maintained on write."""
+
+    def get_queryset(self, user):
+        followed = FollowingUser.objects.filter(user=user).values("following")
+
+        return Article.objects.filter(author__in=followed)
+
+    def get_page_queryset(self, user, size, cursor=None):
+        """Return a queryset holding at least the `size` newest articles of
+        the feed after `cursor`, for pages in the default ordering."""
+        return self.get_queryset(user)
+
+    def count(self, user):
+        return self.get_queryset(user).count()
+
+    def article_created(self, article):
+        pass
+
+    def user_followed(self, user_id, following_id):
+        pass
+
+    def user_unfollowed(self, user_id, following_id):
+        pass
+
+
+class PushFeed(PullFeed):
+    """Fan out every new article to the TimelineEntry rows of the author's
+    followers, so reading a feed only touches the reader's own timeline.
+
+    Timelines keep the FEED_TIMELINE_CAP newest entries. Following an author
+    trims the follower's timeline, entries fanned out later are trimmed by
+    the trim_timelines command, so reading a feed never writes. Articles
+    written while their author has more than FEED_FANOUT_MAX_FOLLOWERS
+    followers are not fanned out but marked, and pulled at read time from
+    then on, also after the author drops back under the limit.
+    """
+
+    batch_size = 1000
+
+    @property
+    def timeline_cap(self):
+        return getattr(settings, "FEED_TIMELINE_CAP", 1000)
+
+    @property
+    def max_followers(self):
+        return getattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 10000)
+
+    def get_pulled_articles(self, user):
+        followed = FollowingUser.objects.filter(user=user).values("following")
+
+        return Article.objects.filter(author__in=followed, fanned_out=False)
+
+    def get_queryset(self, user):
+        timeline = TimelineEntry.objects.filter(user=user).values("article")
+
+        return Article.objects.filter(
+            Q(pk__in=timeline) | Q(pk__in=self.get_pulled_articles(user))
+        )
+
+    def get_page_queryset(self, user, size, cursor=None):
+        # The newest `size` articles of the feed are among the newest `size`
+        # of the timeline and of the pulled articles, both read in index
+        # order. Entries have their article's createdAt.
+        timeline = filter_after_cursor(
+            TimelineEntry.objects.filter(user=user), cursor, id_field="article"
+        ).order_by("-createdAt", "-article")
+        pulled = filter_after_cursor(self.get_pulled_articles(user), cursor).order_by(
+            "-createdAt", "-pk"
+        )
+
+        return Article.objects.filter(
+            pk__in=[
+                *timeline.values_list("article", flat=True)[:size],
+                *pulled.values_list("pk", flat=True)[:size],
+            ]
+        )
+
+    def count(self, user):
+        # Timelines only get fanned out articles, so the two never overlap.
+        return (
+            TimelineEntry.objects.filter(user=user).count()
+            + self.get_pulled_articles(user).count()
+        )
+
+    def trim_timeline(self, user):
+        cutoff = (
+            TimelineEntry.objects.filter(user=user)
+            .order_by("-createdAt")
+            .values_list("createdAt", flat=True)[
+                self.timeline_cap : self.timeline_cap + 1
+            ]
+        )
+
+        if cutoff:
+            TimelineEntry.objects.filter(user=user, createdAt__lte=cutoff[0]).delete()
+
+    def trim_timelines(self):
+        """Trim every timeline over the cap, return how many were."""
+        user_ids = list(
+            TimelineEntry.objects.values("user")
+            .annotate(count=Count("pk"))
+            .filter(count__gt=self.timeline_cap)
+            .values_list("user", flat=True)
+        )
+
+        for user_id in user_ids:
+            self.trim_timeline(user_id)
+
+        return len(user_ids)
+
+    def is_fanned_out(self, author_id):
+        followers = FollowingUser.objects.filter(following=author_id)
+
+        return not followers[self.max_followers : self.max_followers + 1].exists()
+
+    def article_created(self, article):
+        if not self.is_fanned_out(article.author_id):
+            Article.objects.filter(pk=article.pk).update(fanned_out=False)
+            article.fanned_out = False
+            return
+
+        followers = FollowingUser.objects.filter(
+            following=article.author_id
+        ).values_list("user", flat=True)
+
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=pk, article=article, createdAt=article.createdAt)
+                for pk in followers
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+    def user_followed(self, user_id, following_id):
+        articles = Article.objects.filter(
+            author=following_id, fanned_out=True
+        ).order_by("-createdAt")
+
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, article_id=pk, createdAt=created_at)
+                for pk, created_at in articles.values_list("pk", "createdAt")[
+                    : self.timeline_cap
+                ]
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        self.trim_timeline(user_id)
+
+    def user_unfollowed(self, user_id, following_id):
+        TimelineEntry.objects.filter(
+            user=user_id, article__author=following_id
+        ).delete()
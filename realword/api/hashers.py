@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    workers = getattr(settings, "PASSWORD_HASHING_WORKERS", None)
+
+    if not workers:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="password-hashing"
+            )
+
+    return _executor
+
+
+async def offload(func, *args, **kwargs):
+    """Await a function that hashes passwords on a thread of its own.
+
+    The async login and registration views use it, so that hashing neither
+    blocks the event loop nor the single thread the sync views share under
+    ASGI. The threads come from the PASSWORD_HASHING_WORKERS pool, which
+    bounds how many cores hashing bursts can take, or from the loop's default
+    executor. Database connections the function used are then released as at
+    the end of a request.
+    """
+
+    def run():
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return await sync_to_async(run, thread_sensitive=False, executor=_get_executor())()
+
+
+class TunableHasherMixin:
+    """Take the hasher's cost parameters from PASSWORD_HASHER_OPTIONS[algorithm].
+
+    Algorithm names are unchanged, so stored hashes stay compatible with the
+    stock Django hashers. Changing the parameters or the preferred hasher
+    rehashes passwords on the next successful login, through Django's
+    check_password() setter.
+    """
+
+    def __init__(self):
+        options = getattr(settings, "PASSWORD_HASHER_OPTIONS", {})
+
+        for name, value in options.get(self.algorithm, {}).items():
+            setattr(self, name, value)
+
+
+class PBKDF2PasswordHasher(TunableHasherMixin, hashers.PBKDF2PasswordHasher):
+    pass
+
+
+class ScryptPasswordHasher(TunableHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(TunableHasherMixin, hashers.Argon2PasswordHasher):
+    pass
@@ -0,0 +1,100 @@
+from .models import User, FollowingUser, ArticleFavorited
+
+
+class RequestLoader:
+    """Request-scoped identity map for the lookups the serializers repeat.
+
+    Authors, follow checks and favorite checks are resolved with one query
+    per batch of missing ids and memoized for the rest of the request, so an
+    author appearing on many articles or comments of a response is loaded
+    and follow-checked once. Rows that already carry the values (selected
+    authors, for_list() annotations) are left alone.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.users = {}
+        self.following = {}
+        self.favorited = {}
+
+    def load_users(self, ids):
+        missing = set(ids) - self.users.keys()
+
+        if missing:
+            self.users.update(User.objects.in_bulk(missing))
+
+        return self.users
+
+    def load_following(self, ids):
+        missing = set(ids) - self.following.keys()
+
+        if missing:
+            followed = set()
+
+            if self.user.is_authenticated:
+                followed = set(
+                    FollowingUser.objects.filter(
+                        user=self.user, following__in=missing
+                    ).values_list("following_id", flat=True)
+                )
+
+            self.following.update((pk, pk in followed) for pk in missing)
+
+        return self.following
+
+    def load_favorited(self, ids):
+        missing = set(ids) - self.favorited.keys()
+
+        if missing:
+            favorited = set()
+
+            if self.user.is_authenticated:
+                favorited = set(
+                    ArticleFavorited.objects.filter(
+                        user=self.user, article__in=missing
+                    ).values_list("article_id", flat=True)
+                )
+
+            self.favorited.update((pk, pk in favorited) for pk in missing)
+
+        return self.favorited
+
+    def is_following(self, user):
+        return self.load_following([user.pk])[user.pk]
+
+    def is_favorited(self, article):
+        return self.load_favorited([article.pk])[article.pk]
+
+    def prime_authors(self, objects):
+        """Attach memoized authors to articles or comments and batch the
+        follow checks for them."""
+        objects = list(objects)
+        unloaded = [obj for obj in objects if not type(obj).author.is_cached(obj)]
+
+        if unloaded:
+            users = self.load_users(obj.author_id for obj in unloaded)
+
+            for obj in unloaded:
+                obj.author = users[obj.author_id]
+
+        self.load_following(
+            obj.author_id
+            for obj in objects
+            if not hasattr(obj, "is_following_author")
+            and not hasattr(obj.author, "is_followed")
+        )
+
+    def prime_favorited(self, articles):
+        self.load_favorited(
+            article.pk for article in articles if not hasattr(article, "is_favorited")
+        )
+
+
+def get_loader(request):
+    """Return the RequestLoader of a request, creating it on first use."""
+    loader = getattr(request, "loader", None)
+
+    if loader is None:
+        loader = request.loader = RequestLoader(request.user)
+
+    return loader
@@ -0,0 +1,106 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.models import User, Article, Comment, FollowingUser, ArticleFavorited
+
+# (type, queryset, {output key: field}) in the order import_ndjson needs
+# them, users and articles are referenced by username and slug.
+EXPORTS = [
+    (
+        "user",
+        User.objects.all(),
+        {
+            "username": "username",
+            "email": "email",
+            "password_hash": "password",
+            "bio": "bio",
+            "image": "image",
+            "is_active": "is_active",
+            "date_joined": "date_joined",
+        },
+    ),
+    (
+        "article",
+        Article.objects.all(),
+        {
+            "slug": "slug",
+            "title": "title",
+            "description": "description",
+            "body": "body",
+            "tagList": "tagList",
+            "author": "author__username",
+            "createdAt": "createdAt",
+            "updatedAt": "updatedAt",
+        },
+    ),
+    (
+        "comment",
+        Comment.objects.all(),
+        {
+            "article": "article__slug",
+            "author": "author__username",
+            "body": "body",
+            "createdAt": "createdAt",
+            "updatedAt": "updatedAt",
+        },
+    ),
+    (
+        "follow",
+        FollowingUser.objects.all(),
+        {"user": "user__username", "following": "following__username"},
+    ),
+    (
+        "favorite",
+        ArticleFavorited.objects.all(),
+        {"user": "user__username", "article": "article__slug"},
+    ),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Write users, articles, comments, follows and favorites as NDJSON, "
+        "one record per line, in the order import_ndjson reads them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="Output file, - for stdout."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows fetched from the database at a time.",
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        if path == "-":
+            self.export(self.stdout, batch_size)
+            return
+
+        with open(path, "w", encoding="utf-8") as output:
+            counts = self.export(output, batch_size)
+
+        summary = ", ".join(f"{count} {kind}s" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Exported {summary}."))
+
+    def export(self, output, batch_size):
+        counts = {}
+
+        for kind, queryset, fields in EXPORTS:
+            rows = (
+                queryset.order_by("pk")
+                .values_list(*fields.values())
+                .iterator(chunk_size=batch_size)
+            )
+            counts[kind] = 0
+
+            for row in rows:
+                record = {"type": kind, **dict(zip(fields, row))}
+                output.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+                counts[kind] += 1
+
+        return counts
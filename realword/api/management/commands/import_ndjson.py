@@ -0,0 +1,289 @@
+import json
+import multiprocessing
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import bump_articles_count_version
+from api.feeds import get_feed
+from api.models import (
+    User,
+    Tag,
+    Article,
+    ArticleTag,
+    ArticleFavorited,
+    Comment,
+    FollowingUser,
+    make_slug,
+    tag_names,
+)
+
+
+def hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+@contextmanager
+def keep_timestamps(*models):
+    """Let bulk_create() store the createdAt/updatedAt of the records instead
+    of the current time."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Load users, articles, comments, follows and favorites from the NDJSON "
+        "written by export_ndjson. Records must come after the users and "
+        "articles they reference."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, - for stdin.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Records inserted per bulk_create() and transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help=(
+                "Processes hashing the plain text passwords of user records, "
+                "defaults to the number of CPUs. 1 hashes inline."
+            ),
+        )
+
+    def handle(self, *args, path, batch_size, workers, **options):
+        self.workers = workers or os.cpu_count() or 1
+        self.feed = get_feed()
+        self.counts = Counter()
+
+        with ExitStack() as stack:
+            if path == "-":
+                lines = sys.stdin
+            else:
+                lines = stack.enter_context(open(path, encoding="utf-8"))
+
+            if self.workers > 1:
+                # Spawned rather than forked, a forked worker could inherit
+                # locks held by other threads mid-use.
+                self.pool = stack.enter_context(
+                    ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=django.setup,
+                    )
+                )
+            else:
+                self.pool = None
+
+            stack.enter_context(keep_timestamps(Article, Comment))
+            self.load(lines, batch_size)
+
+        if self.counts["article"]:
+            call_command("rebuild_tag_counts", stdout=self.stdout)
+            bump_articles_count_version()
+        if self.counts["favorite"]:
+            call_command("reconcile_favorites_count", stdout=self.stdout)
+            bump_articles_count_version()
+
+        summary = ", ".join(f"{count} {kind}s" for kind, count in self.counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Imported {summary or 'nothing'}."))
+
+    def load(self, lines, batch_size):
+        kind, batch = None, []
+
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+                record_kind = record.pop("type")
+            except (ValueError, KeyError, AttributeError):
+                raise CommandError(f"Line {number} is not an NDJSON record.")
+
+            if record_kind != kind or len(batch) >= batch_size:
+                self.flush(kind, batch)
+                kind, batch = record_kind, []
+
+            batch.append(record)
+
+        self.flush(kind, batch)
+
+    def flush(self, kind, records):
+        if not records:
+            return
+
+        handler = getattr(self, f"import_{kind}s", None)
+        if handler is None:
+            raise CommandError(f"Unknown record type {kind!r}.")
+
+        try:
+            with transaction.atomic():
+                handler(records)
+        except KeyError as e:
+            raise CommandError(f"A {kind} record is missing {e}.")
+
+        self.counts[kind] += len(records)
+
+    def hash_passwords(self, passwords):
+        if self.pool is None or len(passwords) < 2:
+            return hash_passwords(passwords)
+
+        chunk_size = -(-len(passwords) // self.workers)
+        chunks = [
+            passwords[i : i + chunk_size] for i in range(0, len(passwords), chunk_size)
+        ]
+
+        return [
+            hashed
+            for chunk in self.pool.map(hash_passwords, chunks)
+            for hashed in chunk
+        ]
+
+    def get_user_ids(self, usernames):
+        return self.get_ids(User, "username", usernames)
+
+    def get_article_ids(self, slugs):
+        return self.get_ids(Article, "slug", slugs)
+
+    def get_ids(self, model, field, values):
+        values = set(values)
+        ids = dict(
+            model.objects.filter(**{f"{field}__in": values}).values_list(field, "pk")
+        )
+
+        missing = values - ids.keys()
+        if missing:
+            raise CommandError(
+                f"Unknown {model._meta.model_name} {field}s: {sorted(missing)[:10]}"
+            )
+
+        return ids
+
+    def import_users(self, records):
+        plain = [r["password"] for r in records if "password_hash" not in r]
+        hashed = iter(self.hash_passwords(plain))
+        now = timezone.now()
+
+        User.objects.bulk_create(
+            User(
+                username=r["username"],
+                username_lookup=r["username"].casefold(),
+                email=User.objects.normalize_email(r["email"]),
+                password=r["password_hash"] if "password_hash" in r else next(hashed),
+                bio=r.get("bio", ""),
+                image=r.get("image", ""),
+                is_active=r.get("is_active", True),
+                date_joined=r.get("date_joined") or now,
+            )
+            for r in records
+        )
+
+    def import_articles(self, records):
+        authors = self.get_user_ids(r["author"] for r in records)
+        now = timezone.now()
+
+        articles = Article.objects.bulk_create(
+            Article(
+                slug=r.get("slug") or make_slug(r["title"]),
+                title=r["title"],
+                description=r["description"],
+                body=r["body"],
+                tagList=r.get("tagList", []),
+                author_id=authors[r["author"]],
+                createdAt=r.get("createdAt") or now,
+                updatedAt=r.get("updatedAt") or now,
+            )
+            for r in records
+        )
+
+        names = {name for article in articles for name in tag_names(article.tagList)}
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True
+        )
+        tags = dict(Tag.objects.filter(name__in=names).values_list("name", "pk"))
+
+        ArticleTag.objects.bulk_create(
+            ArticleTag(article=article, tag_id=tags[name])
+            for article in articles
+            for name in tag_names(article.tagList)
+        )
+
+        for article in articles:
+            self.feed.article_created(article)
+
+    def import_comments(self, records):
+        articles = self.get_article_ids(r["article"] for r in records)
+        authors = self.get_user_ids(r["author"] for r in records)
+        now = timezone.now()
+
+        Comment.objects.bulk_create(
+            Comment(
+                body=r["body"],
+                article_id=articles[r["article"]],
+                author_id=authors[r["author"]],
+                createdAt=r.get("createdAt") or now,
+                updatedAt=r.get("updatedAt") or now,
+            )
+            for r in records
+        )
+
+    def import_follows(self, records):
+        users = self.get_user_ids(
+            username for r in records for username in (r["user"], r["following"])
+        )
+        pairs = [(users[r["user"]], users[r["following"]]) for r in records]
+
+        FollowingUser.objects.bulk_create(
+            [
+                FollowingUser(user_id=user_id, following_id=following_id)
+                for user_id, following_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+
+        for user_id, following_id in pairs:
+            self.feed.user_followed(user_id, following_id)
+
+    def import_favorites(self, records):
+        users = self.get_user_ids(r["user"] for r in records)
+        articles = self.get_article_ids(r["article"] for r in records)
+
+        # favorites_count is reconciled once the import is done.
+        ArticleFavorited.objects.bulk_create(
+            [
+                ArticleFavorited(
+                    user_id=users[r["user"]], article_id=articles[r["article"]]
+                )
+                for r in records
+            ],
+            ignore_conflicts=True,
+        )
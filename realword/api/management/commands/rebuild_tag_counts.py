@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Tag, ArticleTag
+
+
+class Command(BaseCommand):
+    help = "Recompute Tag.articles_count from the article/tag relation."
+
+    def handle(self, *args, **options):
+        counts = (
+            ArticleTag.objects.filter(tag=OuterRef("pk"))
+            .values("tag")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+
+        updated = Tag.objects.update(articles_count=Coalesce(Subquery(counts), 0))
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counts for {updated} tags."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Article, ArticleFavorited
+
+
+class Command(BaseCommand):
+    help = "Fix Article.favorites_count where it drifted from ArticleFavorited."
+
+    def handle(self, *args, **options):
+        counts = (
+            ArticleFavorited.objects.filter(article=OuterRef("pk"))
+            .values("article")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        actual_count = Coalesce(Subquery(counts), 0)
+
+        drifted = (
+            Article.objects.annotate(actual_count=actual_count)
+            .exclude(favorites_count=F("actual_count"))
+            .values("pk")
+        )
+        updated = Article.objects.filter(pk__in=drifted).update(
+            favorites_count=actual_count
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Fixed favorites_count of {updated} articles.")
+        )
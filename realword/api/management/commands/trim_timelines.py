@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.feeds import PushFeed
+
+
+class Command(BaseCommand):
+    help = (
+        "Trim the PushFeed timelines to their FEED_TIMELINE_CAP newest entries. "
+        "Fan-out adds an entry per new article, run it periodically."
+    )
+
+    def handle(self, *args, **options):
+        trimmed = PushFeed().trim_timelines()
+
+        self.stdout.write(self.style.SUCCESS(f"Trimmed {trimmed} timelines."))
@@ -1,4 +1,5 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
 
 
 class UserManager(BaseUserManager):
@@ -11,6 +12,8 @@ class UserManager(BaseUserManager):
         '''
         if not email:
             raise ValueError('The given email must be set')
+        if not extra_fields.get('username'):
+            raise ValueError('The given username must be set')
 
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
@@ -36,4 +39,85 @@ class UserManager(BaseUserManager):
                 'Superuser must have is_superuser=True.'
             )
 
-        return self._create_user(email, password, **extra_fields)
\ No newline at end of file
+        return self._create_user(email, password, **extra_fields)
+
+
+class ArticleQuerySet(models.QuerySet):
+    def filter_by(self, tag=None, author=None, favorited=None):
+        '''Apply the tag/author/favorited filters of the article list.'''
+        queryset = self
+
+        if tag:
+            from .models import ArticleTag
+
+            # Case-insensitive like the former tagList__icontains filter,
+            # through a subquery as an article may carry the tag in several
+            # cases.
+            tagged_articles = ArticleTag.objects.filter(
+                tag__name__iexact=tag
+            ).values('article')
+
+            queryset = queryset.filter(pk__in=tagged_articles)
+
+        if author:
+            queryset = queryset.filter(author__username_lookup=author.casefold())
+
+        if favorited:
+            from .models import ArticleFavorited
+
+            favorite_articles = ArticleFavorited.objects.filter(
+                user__username_lookup=favorited.casefold()
+            ).values("article")
+
+            queryset = queryset.filter(pk__in=favorite_articles)
+
+        return queryset
+
+    def for_list(self, user):
+        '''Load everything ArticleSerializer needs in a single query: the
+        author through a join and the favorited/following flags for the
+        given user as subqueries.
+        '''
+        from .models import ArticleFavorited, FollowingUser
+
+        queryset = self.select_related("author")
+
+        if user is None or not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=models.Value(False),
+                is_following_author=models.Value(False),
+            )
+
+        return queryset.annotate(
+            is_favorited=models.Exists(
+                ArticleFavorited.objects.filter(
+                    article=models.OuterRef("pk"), user=user
+                )
+            ),
+            is_following_author=models.Exists(
+                FollowingUser.objects.filter(
+                    user=user, following=models.OuterRef("author")
+                )
+            ),
+        )
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_list(self, user):
+        '''Load comments with their author and whether the given user follows
+        the author, as ArticleQuerySet.for_list() does for articles.
+        '''
+        from .models import FollowingUser
+
+        queryset = self.select_related("author")
+
+        if user is None or not user.is_authenticated:
+            return queryset.annotate(is_following_author=models.Value(False))
+
+        return queryset.annotate(
+            is_following_author=models.Exists(
+                FollowingUser.objects.filter(
+                    user=user, following=models.OuterRef("author")
+                )
+            )
+        )
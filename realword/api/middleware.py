@@ -0,0 +1,190 @@
+import json
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from . import profiling
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accept_encoding = re.compile(r"^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def _accepted_encodings(header):
+    """Return the quality values of an Accept-Encoding header."""
+    encodings = {}
+
+    for item in header.split(","):
+        match = re_accept_encoding.match(item)
+
+        if match:
+            try:
+                encodings[match[1].lower()] = float(match[2] or 1)
+            except ValueError:
+                pass
+
+    return encodings
+
+
+def _brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+
+        if data:
+            yield data
+
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware that negotiates brotli as well.
+
+    Brotli is used when the client prefers it, or accepts it with the same
+    quality as gzip, and the brotli package is installed; streaming
+    responses are compressed chunk by chunk. Everything else, including
+    Django's BREACH mitigation for gzip, is left to GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if brotli is None or response.has_header("Content-Encoding"):
+            return super().process_response(request, response)
+
+        accepted = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        br = accepted.get("br", 0)
+
+        if not br or br < accepted.get("gzip", accepted.get("*", 0)):
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=quality)
+
+                    async for chunk in original_iterator:
+                        data = compressor.process(chunk) + compressor.flush()
+
+                        if data:
+                            yield data
+
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = _brotli_sequence(
+                    response.streaming_content, quality
+                )
+
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = brotli.compress(response.content, quality=quality)
+
+            if len(compressed_content) >= len(response.content):
+                return response
+
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+
+        return response
+
+
+class RequestProfilingMiddleware:
+    """Profile a sample of the requests: query count, database time,
+    duplicate queries and the time spent authenticating, serializing and
+    rendering.
+
+    REQUEST_PROFILING_SAMPLE_RATE is the fraction of requests profiled, 0
+    (the default) turns profiling off. Profiles are logged as a JSON line to
+    the api.profiling logger. With REQUEST_PROFILING_SERVER_TIMING, profiled
+    requests from INTERNAL_IPS also get a Server-Timing header, other
+    clients never see it. Work done while a streaming response is consumed
+    happens after the profile is reported and is not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(profiling.install)
+        for connection in connections.all(initialized_only=True):
+            profiling.install(connection)
+
+    def is_sampled(self):
+        rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0)
+
+        return rate > 0 and random.random() < rate
+
+    def sends_server_timing(self, request):
+        return (
+            getattr(settings, "REQUEST_PROFILING_SERVER_TIMING", False)
+            and request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        with profiling.profile_request() as profile:
+            start = time.perf_counter()
+            response = self.get_response(request)
+
+        return self.report(request, response, profile, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+
+        with profiling.profile_request() as profile:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+
+        return self.report(request, response, profile, time.perf_counter() - start)
+
+    def report(self, request, response, profile, total):
+        if self.sends_server_timing(request):
+            timing = profile.server_timing(total)
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **profile.as_dict(total),
+        }
+        profiling.logger.info(json.dumps(record), extra={"profile": record})
+
+        return response
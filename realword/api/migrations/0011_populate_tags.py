@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def populate_tags(apps, schema_editor):
+    Article = apps.get_model("api", "Article")
+    Tag = apps.get_model("api", "Tag")
+    ArticleTag = apps.get_model("api", "ArticleTag")
+
+    article_tags = {
+        pk: {str(name) for name in tag_list}
+        for pk, tag_list in Article.objects.values_list("pk", "tagList").iterator()
+        if isinstance(tag_list, list)
+    }
+
+    names = set().union(*article_tags.values())
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], batch_size=1000, ignore_conflicts=True
+    )
+    tag_ids = dict(Tag.objects.values_list("name", "pk"))
+
+    ArticleTag.objects.bulk_create(
+        [
+            ArticleTag(article_id=pk, tag_id=tag_ids[name])
+            for pk, names in article_tags.items()
+            for name in names
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_tag"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_articles_count(apps, schema_editor):
+    Tag = apps.get_model("api", "Tag")
+    ArticleTag = apps.get_model("api", "ArticleTag")
+
+    counts = (
+        ArticleTag.objects.filter(tag=OuterRef("pk"))
+        .values("tag")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Tag.objects.update(articles_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_populate_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="articles_count",
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(populate_articles_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_favorites_count(apps, schema_editor):
+    Article = apps.get_model("api", "Article")
+    ArticleFavorited = apps.get_model("api", "ArticleFavorited")
+
+    counts = (
+        ArticleFavorited.objects.filter(article=OuterRef("pk"))
+        .values("article")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Article.objects.update(favorites_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="favorites_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_favorites_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["favorites_count", "id"], name="article_favorites_id_idx"
+            ),
+        ),
+    ]
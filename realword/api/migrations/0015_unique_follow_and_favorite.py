@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:02
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicates(apps, schema_editor):
+    for model_name, fields in (
+        ("FollowingUser", ("user", "following")),
+        ("ArticleFavorited", ("article", "user")),
+    ):
+        model = apps.get_model("api", model_name)
+        keep = list(
+            model.objects.values(*fields)
+            .annotate(first=Min("pk"))
+            .values_list("first", flat=True)
+        )
+        model.objects.exclude(pk__in=keep).delete()
+
+    # Duplicate favorites were counted in favorites_count.
+    Article = apps.get_model("api", "Article")
+    ArticleFavorited = apps.get_model("api", "ArticleFavorited")
+
+    counts = (
+        ArticleFavorited.objects.filter(article=OuterRef("pk"))
+        .values("article")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Article.objects.update(favorites_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_article_favorites_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="articlefavorited",
+            constraint=models.UniqueConstraint(
+                fields=("article", "user"), name="unique_article_favorited"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="followinguser",
+            constraint=models.UniqueConstraint(
+                fields=("user", "following"), name="unique_following_user"
+            ),
+        ),
+    ]
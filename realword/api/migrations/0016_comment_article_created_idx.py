@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_unique_follow_and_favorite"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["article", "createdAt", "id"],
+                name="comment_article_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+def fill_username_lookup(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    taken = set()
+
+    # The oldest account keeps a username, later ones differing only in case
+    # get their id appended until they are unique.
+    for user in User.objects.order_by("pk").only("pk", "username"):
+        username = user.username
+
+        while username.casefold() in taken:
+            username = "{}-{}".format(username[:70], user.pk)
+
+        user.username = username
+        user.username_lookup = username.casefold()
+        user.save(update_fields=["username", "username_lookup"])
+        taken.add(user.username_lookup)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0016_comment_article_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="username_lookup",
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(fill_username_lookup, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="user",
+            name="username_lookup",
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="username",
+            field=models.CharField(
+                error_messages={"unique": "A user with that username already exists."},
+                max_length=80,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:48
+
+from django.db import migrations, models
+
+
+def name_empty_usernames(apps, schema_editor):
+    User = apps.get_model("api", "User")
+
+    # Accounts created without a username (e.g. by createsuperuser) get one
+    # made from their id.
+    for user in User.objects.filter(username="").only("pk"):
+        username = "user-{}".format(user.pk)
+
+        while User.objects.filter(username_lookup=username.casefold()).exists():
+            username += "-{}".format(user.pk)
+
+        user.username = username
+        user.username_lookup = username.casefold()
+        user.save(update_fields=["username", "username_lookup"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_unique_username"),
+    ]
+
+    operations = [
+        migrations.RunPython(name_empty_usernames, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.CheckConstraint(
+                check=models.Q(("username", ""), _negated=True),
+                name="user_username_not_empty",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:51
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_username_not_empty"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"), name="tag_name_upper_idx"
+            ),
+        ),
+    ]
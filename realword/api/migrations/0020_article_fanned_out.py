@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef
+
+
+def mark_pulled_articles(apps, schema_editor):
+    # Articles of authors over the limit were pulled at read time before,
+    # unless they were fanned out while the author was still under it.
+    Article = apps.get_model("api", "Article")
+    FollowingUser = apps.get_model("api", "FollowingUser")
+    TimelineEntry = apps.get_model("api", "TimelineEntry")
+
+    authors = (
+        FollowingUser.objects.values("following")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=getattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 10000))
+        .values("following")
+    )
+    Article.objects.filter(author__in=authors).exclude(
+        Exists(TimelineEntry.objects.filter(article=OuterRef("pk")))
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_tag_name_upper_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="fanned_out",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("fanned_out", False)),
+                fields=["author", "createdAt"],
+                name="article_pulled_idx",
+            ),
+        ),
+        migrations.RunPython(mark_pulled_articles, migrations.RunPython.noop),
+    ]
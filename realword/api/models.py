@@ -1,4 +1,8 @@
-from django.db import models
+import secrets
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Upper
 
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
@@ -6,11 +10,19 @@ from django.utils.text import slugify
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.core.exceptions import ValidationError
-from .managers import UserManager
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from .managers import UserManager, ArticleQuerySet, CommentQuerySet
 
 
 class User(AbstractBaseUser, PermissionsMixin):
-    username = models.CharField(max_length=80)
+    username = models.CharField(
+        max_length=80,
+        unique=True,
+        error_messages={"unique": _("A user with that username already exists.")},
+    )
+    # username.casefold(), profiles and filters look users up by it so that
+    # usernames differing only in case cannot coexist.
+    username_lookup = models.CharField(max_length=255, unique=True, editable=False)
 
     email = models.EmailField(
         unique=True,
@@ -46,6 +58,41 @@ class User(AbstractBaseUser, PermissionsMixin):
     objects = UserManager()
 
     USERNAME_FIELD = "email"
+    # Profiles are addressed by username, createsuperuser has to ask for it.
+    REQUIRED_FIELDS = ["username"]
+
+    class Meta:
+        constraints = [
+            # Empty usernames would all share the same username_lookup.
+            models.CheckConstraint(
+                check=~models.Q(username=""), name="user_username_not_empty"
+            ),
+        ]
+
+    def refresh_from_db(self, using=None, fields=None):
+        # Users authenticated from token claims only carry their id, load all
+        # their fields on the first access instead of one query per field.
+        if not getattr(self, "_from_token", False):
+            return super().refresh_from_db(using=using, fields=fields)
+
+        if fields is not None:
+            fields = set(fields) | self.get_deferred_fields()
+
+        # The user may have been deleted since the token was issued.
+        try:
+            super().refresh_from_db(using=using, fields=fields)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    def save(self, *args, **kwargs):
+        if "username" not in self.get_deferred_fields():
+            self.username_lookup = self.username.casefold()
+
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "username" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "username_lookup"}
+
+        super().save(*args, **kwargs)
 
 
 class FollowingUser(models.Model):
@@ -56,11 +103,61 @@ class FollowingUser(models.Model):
         User, on_delete=models.CASCADE, related_name="user_followed"
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "following"], name="unique_following_user"
+            ),
+        ]
+
     def clean(self):
         if self.user == self.following:
             raise ValidationError(_("User cannot follows itself"))
 
 
+class Tag(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    # Number of articles using the tag, maintained by Article.sync_tags() and
+    # on article deletion, rebuilt by the rebuild_tag_counts command.
+    articles_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Serves the case-insensitive tag filter (name__iexact), which
+            # compares UPPER(name) on PostgreSQL.
+            models.Index(Upper("name"), name="tag_name_upper_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def tag_names(tag_list):
+    """The distinct names of an Article.tagList in order, as strings the way
+    migration 0011 built the tags from existing lists."""
+    if not isinstance(tag_list, list):
+        return []
+
+    return list(dict.fromkeys(str(name) for name in tag_list))
+
+
+SLUG_SUFFIX_BYTES = 5
+
+
+def make_slug(title):
+    """Return a slug for `title` with a random suffix.
+
+    The suffix makes slugs unique without querying for taken ones: two
+    articles share a slug with a probability of 2**-40 even when their
+    titles are equal, and the unique constraint catches the rest.
+    """
+    suffix = secrets.token_hex(SLUG_SUFFIX_BYTES)
+    max_length = Article._meta.get_field("slug").max_length - len(suffix) - 1
+    base = slugify(title)[:max_length].strip("-")
+
+    return f"{base}-{suffix}" if base else suffix
+
+
 class Article(models.Model):
     title = models.CharField(max_length=150)
     description = models.CharField(max_length=255)
@@ -70,19 +167,130 @@ class Article(models.Model):
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(User, on_delete=models.PROTECT)
+    # tagList keeps the tags in the order they were given for rendering, tags
+    # is the indexed relation used for filtering; sync_tags() keeps them equal.
+    tags = models.ManyToManyField(Tag, through="ArticleTag", related_name="articles")
+    # Maintained with F() updates on every ArticleFavorited insert/delete,
+    # reconciled by the reconcile_favorites_count command.
+    favorites_count = models.PositiveIntegerField(default=0)
+    # False when the author had too many followers to fan the article out to
+    # when it was written, api.feeds.PushFeed pulls it at read time instead.
+    fanned_out = models.BooleanField(default=True)
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["createdAt", "id"], name="article_created_id_idx"),
+            models.Index(
+                fields=["author", "createdAt"], name="article_author_created_idx"
+            ),
+            models.Index(
+                fields=["favorites_count", "id"], name="article_favorites_id_idx"
+            ),
+            models.Index(
+                fields=["author", "createdAt"],
+                name="article_pulled_idx",
+                condition=Q(fanned_out=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The slug the row had when loaded, so a retitled article can drop
+        # what was cached under its old slug.
+        instance._loaded_slug = instance.__dict__.get("slug")
+        instance._loaded_title = instance.__dict__.get("title")
+        return instance
 
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.title)
+        # favorites_count is only written by the F() updates of api.services,
+        # saving an instance loaded before a favorite must not undo it.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name != "favorites_count"
+            ]
+
+        # Slugs are only made for new articles and for titles that slugify
+        # differently, other saves keep the URL stable.
+        loaded_title = getattr(self, "_loaded_title", None)
+
+        if not self.slug or (
+            loaded_title is not None
+            and "title" not in self.get_deferred_fields()
+            and slugify(self.title) != slugify(loaded_title)
+        ):
+            self.slug = make_slug(self.title)
+            self._loaded_title = self.title
+
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "slug"}
+
         super().save(*args, **kwargs)
 
+    def sync_tags(self):
+        names = tag_names(self.tagList)
+
+        with transaction.atomic():
+            Tag.objects.bulk_create(
+                [Tag(name=name) for name in names], ignore_conflicts=True
+            )
+            tag_ids = set(
+                Tag.objects.filter(name__in=names).values_list("pk", flat=True)
+            )
+            current_ids = set(self.tags.values_list("pk", flat=True))
+
+            added = tag_ids - current_ids
+            removed = current_ids - tag_ids
+
+            if removed:
+                ArticleTag.objects.filter(article=self, tag__in=removed).delete()
+                Tag.objects.filter(pk__in=removed).update(
+                    articles_count=F("articles_count") - 1
+                )
+
+            if added:
+                ArticleTag.objects.bulk_create(
+                    [ArticleTag(article=self, tag_id=pk) for pk in added]
+                )
+                Tag.objects.filter(pk__in=added).update(
+                    articles_count=F("articles_count") + 1
+                )
+
     def __str__(self) -> str:
         return self.title
 
 
+class ArticleTag(models.Model):
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["article", "tag"], name="unique_article_tag"
+            ),
+        ]
+
+
 class ArticleFavorited(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.PROTECT)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["article", "user"], name="unique_article_favorited"
+            ),
+        ]
+
 
 class Comment(models.Model):
     id = models.AutoField(primary_key=True)
@@ -91,3 +299,35 @@ class Comment(models.Model):
     body = models.CharField(max_length=255)
     author = models.ForeignKey(User, on_delete=models.PROTECT)
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Comments of an article in order, and their keyset pagination.
+            models.Index(
+                fields=["article", "createdAt", "id"],
+                name="comment_article_created_idx",
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """An article pushed to a follower's feed when it was written, used by
+    the fan-out-on-write feed strategy (see api.feeds.PushFeed)."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    createdAt = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "article"], name="unique_timeline_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "createdAt"], name="timeline_user_created_idx"
+            ),
+        ]
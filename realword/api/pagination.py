@@ -0,0 +1,87 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+ARTICLE_ORDERINGS = {
+    "-createdAt": ("-createdAt", "-id"),
+    "-favoritesCount": ("-favorites_count", "-id"),
+}
+
+
+def get_article_ordering(params):
+    """Return the order_by() fields for the `ordering` query parameter of
+    the article lists, newest first by default."""
+    ordering = params.get("ordering", "-createdAt")
+
+    if ordering not in ARTICLE_ORDERINGS:
+        raise ValidationError({"ordering": [_("Unknown ordering.")]})
+
+    if "cursor" in params and ordering != "-createdAt":
+        raise ValidationError(
+            {"cursor": [_("Cursor pagination only supports the default ordering.")]}
+        )
+
+    return ARTICLE_ORDERINGS[ordering]
+
+
+def encode_cursor(article):
+    value = f"{article.createdAt.isoformat()}|{article.pk}"
+
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = value.split("|")
+
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({"cursor": [_("Invalid cursor.")]})
+
+
+def filter_after_cursor(queryset, cursor, descending=True, id_field="pk"):
+    """Filter `queryset` to the rows after `cursor`, `id_field` names the
+    field holding the article id."""
+    if not cursor:
+        return queryset
+
+    created_at, pk = decode_cursor(cursor)
+    lookup = "lt" if descending else "gt"
+
+    return queryset.filter(
+        Q(**{f"createdAt__{lookup}": created_at})
+        | Q(createdAt=created_at, **{f"{id_field}__{lookup}": pk})
+    )
+
+
+def split_page(page, limit):
+    """Split the rows of cursor_page() into the page and the cursor of the
+    next page."""
+    if len(page) > limit:
+        page = page[:limit]
+
+        return page, encode_cursor(page[-1])
+
+    return page, None
+
+
+def cursor_page(queryset, cursor, limit, descending=True):
+    """Return the rows of the page that starts right after `cursor` in a
+    queryset ordered by ("-createdAt", "-id"), plus one more row which tells
+    whether there is a next page, see split_page(). With `descending` false
+    the queryset is ordered by ("createdAt", "id").
+
+    The page is located with a range condition on the (createdAt, id) index
+    instead of an OFFSET, so its cost does not grow with the page depth.
+    An empty cursor returns the first page.
+    """
+    # A page needs a last row to make the next cursor from.
+    if limit < 1:
+        raise ValidationError({"limit": [_("Must be at least 1 with a cursor.")]})
+
+    return filter_after_cursor(queryset, cursor, descending)[: limit + 1]
@@ -0,0 +1,38 @@
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+# orjson reads integers beyond 64 bits as floats, json keeps them exact.
+# Below -2**63 that already happens with 19 digits.
+LONG_NUMBER = re.compile(rb"\d{19}")
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser parsing UTF-8 bodies with orjson, when installed.
+
+    Anything orjson rejects is handed to JSONParser, which either accepts
+    it the way it always did or raises the same ParseError.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+
+        if not LONG_NUMBER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        return super().parse(io.BytesIO(body), media_type, parser_context)
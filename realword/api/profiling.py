@@ -0,0 +1,140 @@
+"""Per-request timings collected by RequestProfilingMiddleware.
+
+The middleware starts a RequestProfile for the requests it samples. The
+database execute wrapper and the timer() blocks around authentication,
+serialization and rendering add to the profile of the current context and
+do nothing for other requests, so they can stay in place.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.utils.hashable import make_hashable
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.timings = Counter()
+        self.queries = Counter()
+        # executemany() calls, counted but not compared.
+        self.batches = 0
+        self.db_time = 0.0
+        self.running = set()
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values()) + self.batches
+
+    def duplicate_queries(self):
+        """(sql, count) of the statements executed more than once with the
+        same parameters, most repeated first."""
+        return [
+            (sql, count)
+            for (sql, params), count in self.queries.most_common()
+            if count > 1
+        ]
+
+    def server_timing(self, total):
+        duplicates = sum(count - 1 for _, count in self.duplicate_queries())
+        metrics = [
+            f"db;dur={self.db_time * 1000:.2f};"
+            f'desc="{self.query_count} queries ({duplicates} duplicates)"'
+        ]
+        metrics += [
+            f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.timings.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.2f}")
+
+        return ", ".join(metrics)
+
+    def as_dict(self, total):
+        duplicates = self.duplicate_queries()
+
+        return {
+            "total_ms": round(total * 1000, 2),
+            "queries": self.query_count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "duplicate_queries": sum(count - 1 for _, count in duplicates),
+            # The worst offenders, enough to spot an N+1.
+            "duplicates": [
+                {"sql": sql[:200], "count": count} for sql, count in duplicates[:3]
+            ],
+            **{
+                f"{name}_ms": round(seconds * 1000, 2)
+                for name, seconds in self.timings.items()
+            },
+        }
+
+
+@contextmanager
+def profile_request():
+    profile = RequestProfile()
+    token = _current.set(profile)
+
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in the block to the `name` timing of the current
+    profile. Nested blocks of the same name only count once."""
+    profile = _current.get()
+
+    if profile is None or name in profile.running:
+        yield
+        return
+
+    profile.running.add(name)
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        profile.timings[name] += time.perf_counter() - start
+        profile.running.discard(name)
+
+
+def _params_key(params):
+    # A hash rather than the params themselves, they can be large.
+    try:
+        return hash(make_hashable(params))
+    except TypeError:
+        # Unhashable values, never counted as a duplicate.
+        return object()
+
+
+def record_queries(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the statements of the
+    profiled request."""
+    profile = _current.get()
+
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - start
+
+        if many:
+            profile.batches += 1
+        else:
+            profile.queries[(sql, _params_key(params))] += 1
+
+
+def install(connection, **kwargs):
+    # First in the list, connection.execute_wrapper() blocks pop the last.
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
@@ -0,0 +1,49 @@
+from rest_framework.renderers import JSONRenderer
+
+from .profiling import timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer producing the same bytes with orjson, when installed.
+
+    Datetimes, dates, times and UUIDs are encoded natively in the format of
+    the DRF encoder, other types go through its default(). Indented output,
+    non default UNICODE_JSON/COMPACT_JSON settings and data orjson cannot
+    encode (e.g. integers over 64 bits) are rendered by JSONRenderer. Floats
+    are the exception to byte equality: orjson writes 1e16 and 0.00001 where
+    json writes 1e+16 and 1e-05, and NaN as null; the API renders none.
+    """
+
+    @timer("render")
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_UTC_Z
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like JSONRenderer does, to stay a strict javascript subset.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -1,18 +1,12 @@
 from rest_framework import serializers
 from rest_framework.authentication import authenticate
+from django.db import models
 from django.utils.translation import gettext_lazy as _
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import User, FollowingUser, Article, ArticleFavorited, Comment
-
-
-def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
-
-    return {
-        "refresh": str(refresh),
-        "access": str(refresh.access_token),
-    }
+from .loaders import get_loader
+from .models import User, Article, Comment
+from .profiling import timer
+from .tokens import get_access_token
 
 
 class LoginSerializer(serializers.ModelSerializer):
@@ -44,16 +38,44 @@ class LoginSerializer(serializers.ModelSerializer):
         return data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedDataMixin:
+    """Count the rendering of `data` as serializer time of the request
+    profile."""
+
+    @property
+    @timer("serialize")
+    def data(self):
+        return super().data
+
+
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     token = serializers.SerializerMethodField("user_token")
 
     def user_token(self, user):
-        return get_tokens_for_user(user)["access"]
+        return get_access_token(user)
 
     class Meta:
         model = User
         fields = ["username", "email", "password", "bio", "image", "token"]
-        extra_kwargs = {"password": {"write_only": True}}
+        extra_kwargs = {
+            "password": {"write_only": True},
+            # Replaced by the case-insensitive validate_username().
+            "username": {"validators": []},
+        }
+
+    def validate_username(self, value):
+        users = User.objects.filter(username_lookup=value.casefold())
+
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+
+        if users.exists():
+            raise serializers.ValidationError(
+                User._meta.get_field("username").error_messages["unique"],
+                code="unique",
+            )
+
+        return value
 
     def create(self, validated_data):
         user = User(username=validated_data["username"], email=validated_data["email"])
@@ -62,25 +84,32 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class ProfileSerializer(serializers.ModelSerializer):
-    following = serializers.SerializerMethodField("_following")
+class LoaderListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """Prime the request loader with every item before rendering them, so
+    the lookups of the whole list are batched."""
 
-    def _following(self, obj):
-        user = self.context.get("request").user
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+
+        items = list(data)
+        self.child.prime(items)
 
-        following = FollowingUser.objects.filter(user=user, following=obj).exists()
+        return super().to_representation(items)
 
-        if self.context.get("request").method == "POST" and not following:
-            FollowingUser.objects.create(user=user, following=obj)
 
-            return True
+class ProfileSerializer(TimedDataMixin, serializers.ModelSerializer):
+    following = serializers.SerializerMethodField("_following")
 
-        if self.context.get("request").method == "DELETE" and following:
-            FollowingUser.objects.get(user=user, following=obj).delete()
+    def _following(self, obj):
+        # Set by ProfileFollowView to the state it just wrote.
+        if "following" in self.context:
+            return self.context["following"]
 
-            return False
+        if hasattr(obj, "is_followed"):
+            return obj.is_followed
 
-        return following
+        return get_loader(self.context.get("request")).is_following(obj)
 
     class Meta:
         model = User
@@ -92,40 +121,23 @@ class ProfileSerializer(serializers.ModelSerializer):
     #     return {"profile": data}
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(TimedDataMixin, serializers.ModelSerializer):
     author = ProfileSerializer(read_only=True)
     favorited = serializers.SerializerMethodField("_favorited")
     favoritesCount = serializers.SerializerMethodField("_count_favorited")
 
     def _favorited(self, article) -> bool:
-        user = self.context.get("request").user
-
-        favorited = ArticleFavorited.objects.filter(user=user, article=article)
+        # Set by ArticleFavoriteView to the state it just wrote.
+        if "favorited" in self.context:
+            return self.context["favorited"]
 
-        if (
-            self.context.get("favorite")
-            and self.context.get("request").method == "POST"
-            and not favorited
-        ):
-            ArticleFavorited.objects.create(user=user, article=article)
+        if hasattr(article, "is_favorited"):
+            return article.is_favorited
 
-            return True
-
-        if (
-            self.context.get("favorite")
-            and self.context.get("request").method == "DELETE"
-            and favorited
-        ):
-            ArticleFavorited.objects.get(user=user, article=article).delete()
-
-            return False
-
-        return bool(favorited)
+        return get_loader(self.context.get("request")).is_favorited(article)
 
     def _count_favorited(self, article) -> int:
-        count = ArticleFavorited.objects.filter(article=article).count()
-
-        return count
+        return article.favorites_count
 
     class Meta:
         model = Article
@@ -141,26 +153,77 @@ class ArticleSerializer(serializers.ModelSerializer):
             "favoritesCount",
             "author",
         ]
+        # Made from the title by Article.save().
+        extra_kwargs = {"slug": {"read_only": True}}
+        list_serializer_class = LoaderListSerializer
 
     def create(self, validated_data):
         user = self.context.get("request").user
 
         validated_data["author"] = user
 
-        return super().create(validated_data)
+        article = super().create(validated_data)
+        article.sync_tags()
 
-    # def to_representation(self, instance):
-    #     data = super().to_representation(instance)
+        return article
+
+    def update(self, instance, validated_data):
+        article = super().update(instance, validated_data)
+
+        if "tagList" in validated_data:
+            article.sync_tags()
+
+        return article
+
+    def prime(self, articles):
+        loader = get_loader(self.context.get("request"))
+        loader.prime_authors(articles)
+        loader.prime_favorited(articles)
+
+    def to_representation(self, instance):
+        self.prime([instance])
+
+        # Rows coming from Article.objects.for_list() carry the following flag
+        # for their author, hand it over to the nested ProfileSerializer.
+        if hasattr(instance, "is_following_author"):
+            instance.author.is_followed = instance.is_following_author
+
+        return super().to_representation(instance)
+
+
+class ArticleSummarySerializer(ArticleSerializer):
+    """ArticleSerializer without the body, for list views that only show
+    the title, description and tags."""
 
-    #     return {"article": data}
+    class Meta(ArticleSerializer.Meta):
+        fields = [field for field in ArticleSerializer.Meta.fields if field != "body"]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+def get_article_list_serializer(params):
+    """Return the serializer for the `view` query parameter of the article
+    lists: the full articles by default, ArticleSummarySerializer for
+    `view=summary`."""
+    view = params.get("view", "full")
+
+    if view not in ARTICLE_LIST_VIEWS:
+        raise serializers.ValidationError({"view": [_("Unknown view.")]})
+
+    return ARTICLE_LIST_VIEWS[view]
+
+
+ARTICLE_LIST_VIEWS = {
+    "full": ArticleSerializer,
+    "summary": ArticleSummarySerializer,
+}
+
+
+class CommentSerializer(TimedDataMixin, serializers.ModelSerializer):
     author = ProfileSerializer(read_only=True)
 
     class Meta:
         model = Comment
         fields = ["id", "createdAt", "updatedAt", "body", "author"]
+        list_serializer_class = LoaderListSerializer
 
     def create(self, validated_data):
         user = self.context.get("request").user
@@ -172,3 +235,14 @@ class CommentSerializer(serializers.ModelSerializer):
         validated_data["article"] = article
 
         return super().create(validated_data)
+
+    def prime(self, comments):
+        get_loader(self.context.get("request")).prime_authors(comments)
+
+    def to_representation(self, instance):
+        self.prime([instance])
+
+        if hasattr(instance, "is_following_author"):
+            instance.author.is_followed = instance.is_following_author
+
+        return super().to_representation(instance)
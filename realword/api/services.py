@@ -0,0 +1,96 @@
+"""Follow and favorite writes.
+
+Each toggle is a single INSERT or DELETE against the unique (user, following)
+and (article, user) constraints, so repeated or concurrent requests cannot
+create duplicate rows. An IntegrityError only counts as "already done" when
+the row is there, the counter and the feed only change when a row was
+actually inserted or deleted.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .cache import bump_favorited_count_version, invalidate_article_detail
+from .feeds import get_feed
+from .models import FollowingUser, Article, ArticleFavorited
+
+
+def check_user(user):
+    """Load `user`, raising AuthenticationFailed for a user authenticated
+    from a token who has been deleted since. Their INSERTs fail on the
+    foreign key rather than on the unique constraint, any other failure is
+    re-raised."""
+    user.refresh_from_db(fields=["username"])
+
+
+def follow(user, profile):
+    """Make `user` follow `profile`. Return False if it already did."""
+    try:
+        with transaction.atomic():
+            FollowingUser.objects.create(user=user, following=profile)
+    except IntegrityError:
+        if FollowingUser.objects.filter(user=user, following=profile).exists():
+            return False
+        check_user(user)
+        raise
+
+    get_feed().user_followed(user.pk, profile.pk)
+
+    return True
+
+
+def unfollow(user, profile):
+    """Make `user` stop following `profile`. Return False if it did not."""
+    deleted, _ = FollowingUser.objects.filter(user=user, following=profile).delete()
+
+    if not deleted:
+        return False
+
+    get_feed().user_unfollowed(user.pk, profile.pk)
+
+    return True
+
+
+def favorite(user, article):
+    """Add `article` to the favorites of `user`. Return False if it already
+    was one."""
+    try:
+        with transaction.atomic():
+            ArticleFavorited.objects.create(user=user, article=article)
+            Article.objects.filter(pk=article.pk).update(
+                favorites_count=F("favorites_count") + 1
+            )
+    except IntegrityError:
+        if ArticleFavorited.objects.filter(user=user, article=article).exists():
+            return False
+        check_user(user)
+        raise
+
+    article.favorites_count += 1
+    bump_favorited_count_version(user.pk)
+    invalidate_article_detail(article.slug)
+
+    return True
+
+
+def unfavorite(user, article):
+    """Remove `article` from the favorites of `user`. Return False if it was
+    not one."""
+    with transaction.atomic():
+        deleted, _ = ArticleFavorited.objects.filter(
+            user=user, article=article
+        ).delete()
+
+        if deleted:
+            Article.objects.filter(pk=article.pk).update(
+                favorites_count=F("favorites_count") - 1
+            )
+
+    if not deleted:
+        return False
+
+    article.favorites_count -= 1
+    bump_favorited_count_version(user.pk)
+    invalidate_article_detail(article.slug)
+
+    return True
@@ -0,0 +1,54 @@
+from django.db.models import F
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .authentication import inactive_users
+from .cache import (
+    bump_articles_count_version,
+    invalidate_article_detail,
+    invalidate_article_author,
+)
+from .feeds import get_feed
+from .models import User, Tag, Article
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_articles_count(sender, instance, **kwargs):
+    bump_articles_count_version()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_cached_article(sender, instance, **kwargs):
+    invalidate_article_detail(instance.slug, getattr(instance, "_loaded_slug", None))
+
+
+@receiver(pre_delete, sender=Article)
+def decrement_tag_counts(sender, instance, **kwargs):
+    Tag.objects.filter(articles=instance).update(articles_count=F("articles_count") - 1)
+
+
+@receiver(post_save, sender=User)
+def update_inactive_users(sender, instance, **kwargs):
+    inactive_users.update(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_author(sender, instance, **kwargs):
+    invalidate_article_author(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_count(sender, instance, created, update_fields, **kwargs):
+    # A renamed user changes what the author/favorited filters match.
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+
+    bump_articles_count_version()
+
+
+@receiver(post_save, sender=Article)
+def fan_out_article(sender, instance, created, **kwargs):
+    if created:
+        get_feed().article_created(instance)
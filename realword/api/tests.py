@@ -1,3 +1,2053 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import (
+    AsyncClient,
+    AsyncRequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import async_views, cache as api_cache, hashers, profiling
+from .authentication import inactive_users
+from .loaders import RequestLoader
+from .middleware import brotli
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from .models import (
+    User,
+    FollowingUser,
+    Comment,
+    Tag,
+    Article,
+    ArticleFavorited,
+    TimelineEntry,
+)
+from .services import follow, unfollow, favorite
+from .tokens import access_tokens, get_access_token
+
+
+class ArticleListQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+
+        for i in range(5):
+            author = User.objects.create_user(
+                email=f"author{i}@example.com",
+                password="password",
+                username=f"author{i}",
+            )
+
+            if i % 2:
+                FollowingUser.objects.create(user=cls.reader, following=author)
+
+            for j in range(5):
+                article = Article.objects.create(
+                    title=f"Article {i} {j}",
+                    description="description",
+                    body="body",
+                    author=author,
+                )
+
+                if j % 2:
+                    favorite(cls.reader, article)
+
+    def setUp(self):
+        cache.clear()
+        inactive_users.refresh()
+        self.client = APIClient()
+        token = get_access_token(self.reader)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    def test_query_count_does_not_depend_on_limit(self):
+        # article page, articlesCount
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/articles", {"limit": 2})
+        self.assertEqual(len(response.data["articles"]), 2)
+
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/articles", {"limit": 25})
+        self.assertEqual(len(response.data["articles"]), 25)
+
+    def test_annotated_fields_match_per_row_values(self):
+        response = self.client.get("/api/articles", {"limit": 25})
+
+        for data in response.data["articles"]:
+            article = Article.objects.get(slug=data["slug"])
+
+            self.assertEqual(
+                data["favorited"],
+                ArticleFavorited.objects.filter(
+                    article=article, user=self.reader
+                ).exists(),
+            )
+            self.assertEqual(
+                data["favoritesCount"],
+                ArticleFavorited.objects.filter(article=article).count(),
+            )
+            self.assertEqual(
+                data["author"]["following"],
+                FollowingUser.objects.filter(
+                    user=self.reader, following=article.author
+                ).exists(),
+            )
+
+    def test_anonymous_list(self):
+        self.client.credentials()
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/articles")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(a["favorited"] for a in response.data["articles"]))
+
+
+class ArticleCursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+
+        for i in range(7):
+            Article.objects.create(
+                title=f"Article {i}",
+                description="description",
+                body="body",
+                author=author,
+            )
+
+    def test_cursor_walks_every_article_once(self):
+        client = APIClient()
+        expected = list(
+            Article.objects.order_by("-createdAt", "-id").values_list("slug", flat=True)
+        )
+
+        slugs = []
+        cursor = ""
+        while cursor is not None:
+            response = client.get("/api/articles", {"limit": 3, "cursor": cursor})
+            slugs += [article["slug"] for article in response.data["articles"]]
+            cursor = response.data["nextCursor"]
+
+        self.assertEqual(slugs, expected)
+
+    def test_offset_mode_is_unchanged(self):
+        response = APIClient().get("/api/articles", {"limit": 3, "offset": 3})
+
+        self.assertEqual(len(response.data["articles"]), 3)
+        self.assertNotIn("nextCursor", response.data)
+
+    def test_invalid_cursor(self):
+        response = APIClient().get("/api/articles", {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_needs_a_positive_limit(self):
+        for limit in (0, -1):
+            response = APIClient().get("/api/articles", {"limit": limit, "cursor": ""})
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("limit", response.data)
+
+
+class ArticlesCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+
+        for i in range(5):
+            article = Article.objects.create(
+                title=f"Article {i}",
+                description="description",
+                body="body",
+                tagList=["even" if i % 2 == 0 else "odd"],
+                author=cls.author,
+            )
+            article.sync_tags()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_count_is_not_limited_to_the_page(self):
+        response = self.client.get("/api/articles", {"limit": 2})
+        self.assertEqual(response.data["articlesCount"], 5)
+
+        response = self.client.get("/api/articles", {"limit": 2, "tag": "even"})
+        self.assertEqual(response.data["articlesCount"], 3)
+
+    def test_count_is_cached_per_filter(self):
+        self.client.get("/api/articles")
+
+        # only the page query, the count comes from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/articles", {"offset": 2})
+        self.assertEqual(response.data["articlesCount"], 5)
+
+        with self.assertNumQueries(2):
+            self.client.get("/api/articles", {"tag": "odd"})
+
+    def test_article_write_invalidates_count(self):
+        self.client.get("/api/articles")
+
+        Article.objects.create(
+            title="Another", description="description", body="body", author=self.author
+        )
+
+        response = self.client.get("/api/articles")
+        self.assertEqual(response.data["articlesCount"], 6)
+
+    def test_favorite_invalidates_favorited_count(self):
+        response = self.client.get("/api/articles", {"favorited": "author"})
+        self.assertEqual(response.data["articlesCount"], 0)
+
+        favorite(self.author, Article.objects.first())
+
+        response = self.client.get("/api/articles", {"favorited": "author"})
+        self.assertEqual(response.data["articlesCount"], 1)
+
+
+class ArticleTagTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def create_article(self, title, tag_list):
+        return self.client.post(
+            "/api/articles",
+            {
+                "article": {
+                    "title": title,
+                    "description": "description",
+                    "body": "body",
+                    "tagList": tag_list,
+                }
+            },
+            format="json",
+        )
+
+    def test_tag_list_shape_is_kept(self):
+        response = self.create_article("Tagged", ["python", "django", "python"])
+
+        self.assertEqual(
+            response.data["article"]["tagList"], ["python", "django", "python"]
+        )
+        self.assertEqual(
+            set(Tag.objects.values_list("name", flat=True)), {"python", "django"}
+        )
+
+    def test_tags_are_strings(self):
+        article = Article.objects.create(
+            title="Numbers",
+            description="description",
+            body="body",
+            author=self.author,
+            tagList=[2024, "2024", 1.5],
+        )
+        article.sync_tags()
+
+        self.assertEqual(
+            sorted(article.tags.values_list("name", flat=True)), ["1.5", "2024"]
+        )
+
+    def test_filter_matches_whole_tag(self):
+        self.create_article("Django", ["django"])
+        self.create_article("Go", ["go"])
+
+        response = self.client.get("/api/articles", {"tag": "go"})
+
+        self.assertEqual([a["title"] for a in response.data["articles"]], ["Go"])
+
+    def test_filter_ignores_case(self):
+        self.create_article("Django", ["Django", "django"])
+        self.create_article("Go", ["go"])
+
+        response = self.client.get("/api/articles", {"tag": "DJANGO"})
+
+        self.assertEqual([a["title"] for a in response.data["articles"]], ["Django"])
+        self.assertEqual(response.data["articlesCount"], 1)
+
+    def test_update_replaces_tags(self):
+        slug = self.create_article("Retagged", ["old"]).data["article"]["slug"]
+
+        self.client.put(
+            f"/api/articles/{slug}", {"article": {"tagList": ["new"]}}, format="json"
+        )
+
+        article = Article.objects.get(slug=slug)
+        self.assertEqual(list(article.tags.values_list("name", flat=True)), ["new"])
+
+
+class TagViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+
+    def setUp(self):
+        api_cache._popular_tags.clear()
+
+    def create_article(self, title, tag_list):
+        article = Article.objects.create(
+            title=title,
+            description="description",
+            body="body",
+            tagList=tag_list,
+            author=self.author,
+        )
+        article.sync_tags()
+
+        return article
+
+    def test_tags_ordered_by_popularity(self):
+        self.create_article("One", ["python", "django"])
+        self.create_article("Two", ["python"])
+
+        response = APIClient().get("/api/tags")
+
+        self.assertEqual(response.data, {"tags": ["python", "django"]})
+
+    def test_counts_follow_updates_and_deletes(self):
+        article = self.create_article("One", ["python", "django"])
+        self.create_article("Two", ["python"])
+
+        article.tagList = ["rust"]
+        article.save()
+        article.sync_tags()
+        self.assertEqual(
+            dict(Tag.objects.values_list("name", "articles_count")),
+            {"python": 1, "django": 0, "rust": 1},
+        )
+
+        article.delete()
+        self.assertEqual(Tag.objects.get(name="rust").articles_count, 0)
+
+    def test_tags_are_cached(self):
+        self.create_article("One", ["python"])
+        APIClient().get("/api/tags")
+
+        with self.assertNumQueries(0):
+            response = APIClient().get("/api/tags")
+
+        self.assertEqual(response.data, {"tags": ["python"]})
+
+    def test_rebuild_tag_counts(self):
+        self.create_article("One", ["python"])
+        Tag.objects.update(articles_count=42)
+
+        call_command("rebuild_tag_counts", stdout=StringIO())
+
+        self.assertEqual(Tag.objects.get(name="python").articles_count, 1)
+
+
+class ArticleFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        cls.followed = User.objects.create_user(
+            email="followed@example.com", password="password", username="followed"
+        )
+        cls.other = User.objects.create_user(
+            email="other@example.com", password="password", username="other"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def create_article(self, title, author):
+        return Article.objects.create(
+            title=title, description="description", body="body", author=author
+        )
+
+    def get_feed_titles(self, **params):
+        response = self.client.get("/api/articles/feed", params)
+
+        return [article["title"] for article in response.data["articles"]]
+
+    def assert_feed(self):
+        self.create_article("Before", self.followed)
+        follow(self.reader, self.followed)
+        self.create_article("After", self.followed)
+        self.create_article("Unrelated", self.other)
+
+        self.assertEqual(self.get_feed_titles(), ["After", "Before"])
+
+        unfollow(self.reader, self.followed)
+        self.assertEqual(self.get_feed_titles(), [])
+
+    def test_pull_feed(self):
+        self.assert_feed()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(FEED_STRATEGY="api.feeds.PushFeed")
+    def test_push_feed(self):
+        self.assert_feed()
+
+    @override_settings(FEED_STRATEGY="api.feeds.PushFeed", FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_push_feed_pulls_popular_authors(self):
+        self.assert_feed()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(FEED_STRATEGY="api.feeds.PushFeed", FEED_TIMELINE_CAP=2)
+    def test_push_feed_timeline_is_capped(self):
+        follow(self.reader, self.followed)
+        for i in range(4):
+            self.create_article(f"Article {i}", self.followed)
+
+        # Reading the feed does not trim it, the command does.
+        with CaptureQueriesContext(connection) as queries:
+            self.get_feed_titles()
+        self.assertTrue(all(q["sql"].startswith("SELECT") for q in queries))
+
+        call_command("trim_timelines", stdout=StringIO())
+
+        self.assertEqual(self.get_feed_titles(), ["Article 3", "Article 2"])
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 2)
+
+    @override_settings(FEED_STRATEGY="api.feeds.PushFeed", FEED_TIMELINE_CAP=2)
+    def test_push_feed_follow_trims_the_timeline(self):
+        follow(self.reader, self.other)
+        self.create_article("Old 1", self.other)
+        self.create_article("Old 2", self.other)
+        self.create_article("New 1", self.followed)
+        self.create_article("New 2", self.followed)
+
+        follow(self.reader, self.followed)
+
+        self.assertEqual(self.get_feed_titles(), ["New 2", "New 1"])
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 2)
+
+    @override_settings(FEED_STRATEGY="api.feeds.PushFeed", FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_push_feed_keeps_pulling_after_the_author_drops_under_the_limit(self):
+        follow(self.reader, self.followed)
+        follow(self.other, self.followed)
+        self.create_article("Pulled", self.followed)
+
+        unfollow(self.other, self.followed)
+        self.create_article("Fanned out", self.followed)
+
+        self.assertEqual(self.get_feed_titles(), ["Fanned out", "Pulled"])
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list("article__title", flat=True)),
+            ["Fanned out"],
+        )
+
+    @override_settings(FEED_STRATEGY="api.feeds.PushFeed", FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_push_feed_pages(self):
+        follow(self.reader, self.followed)
+        follow(self.reader, self.other)
+        follow(self.followed, self.other)
+        for i in range(6):
+            self.create_article(f"Article {i}", [self.followed, self.other][i % 2])
+
+        expected = [f"Article {i}" for i in reversed(range(6))]
+        self.assertEqual(self.get_feed_titles(), expected)
+        self.assertEqual(self.get_feed_titles(offset=2, limit=3), expected[2:5])
+
+        response = self.client.get("/api/articles/feed", {"cursor": "", "limit": 4})
+        self.assertEqual(response.data["articlesCount"], 6)
+        self.assertEqual(
+            self.get_feed_titles(cursor=response.data["nextCursor"], limit=4),
+            expected[4:],
+        )
+
+    def test_feed_requires_authentication(self):
+        response = APIClient().get("/api/articles/feed")
+
+        self.assertEqual(response.status_code, 401)
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+
+    def setUp(self):
+        inactive_users.refresh()
+        self.client = APIClient()
+        token = get_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    def test_user_is_loaded_once_when_needed(self):
+        # one query for the whole user row, none for the token
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/user")
+
+        self.assertEqual(response.data["user"]["email"], "user@example.com")
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/api/user")
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_inactive_users_are_reloaded(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        inactive_users.expires = 0
+
+        response = self.client.get("/api/user")
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).delete()
+
+        response = self.client.get("/api/user")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "user_not_found")
+
+
+class DeletedUserWritesTest(TransactionTestCase):
+    # The foreign key only fails when the outermost transaction commits.
+    def test_follow_and_favorite_are_rejected(self):
+        author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        Article.objects.create(
+            title="Article",
+            description="description",
+            body="body",
+            author=author,
+            slug="article",
+        )
+        user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        inactive_users.refresh()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {get_access_token(user)}")
+        User.objects.filter(pk=user.pk).delete()
+
+        response = client.post("/api/profiles/author/follow")
+        self.assertEqual(response.status_code, 401)
+        response = client.post("/api/articles/article/favorite")
+        self.assertEqual(response.status_code, 401)
+
+        self.assertFalse(FollowingUser.objects.exists())
+        self.assertFalse(ArticleFavorited.objects.exists())
+
+
+class AccessTokenCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+
+    def setUp(self):
+        access_tokens.clear()
+
+    def test_token_is_reused(self):
+        token = get_access_token(self.user)
+
+        self.assertEqual(get_access_token(self.user), token)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        response = client.get("/api/user")
+
+        self.assertEqual(response.data["user"]["token"], token)
+
+    def test_password_change_issues_new_token(self):
+        token = get_access_token(self.user)
+
+        self.user.set_password("another password")
+
+        self.assertNotEqual(get_access_token(self.user), token)
+
+    def test_cache_is_bounded(self):
+        users = [self.user] + [
+            User(pk=pk, email=f"user{pk}@example.com", password="!")
+            for pk in range(1000, 1000 + access_tokens.maxsize)
+        ]
+
+        for user in users:
+            get_access_token(user)
+
+        self.assertEqual(len(access_tokens.tokens), access_tokens.maxsize)
+        self.assertNotIn(access_tokens.get_key(self.user), access_tokens.tokens)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        "api.hashers.ScryptPasswordHasher",
+        "api.hashers.PBKDF2PasswordHasher",
+    ],
+    PASSWORD_HASHER_OPTIONS={"scrypt": {"work_factor": 2**10}},
+)
+class PasswordHashingTest(TestCase):
+    def login(self):
+        return APIClient().post(
+            "/api/users/login",
+            {"user": {"email": "user@example.com", "password": "password"}},
+            format="json",
+        )
+
+    def test_password_is_rehashed_on_login(self):
+        user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        user.password = make_password("password", hasher="pbkdf2_sha256")
+        user.save()
+
+        self.assertEqual(self.login().status_code, 200)
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$"))
+        self.assertEqual(
+            get_hasher("scrypt").decode(user.password)["work_factor"], 2**10
+        )
+
+
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        FollowingUser.objects.create(user=cls.reader, following=cls.author)
+
+        for i in range(3):
+            article = Article.objects.create(
+                title=f"Article {i}",
+                slug=f"article-{i}",
+                description="description",
+                body="body",
+                tagList=["tag"],
+                author=cls.author,
+            )
+            article.sync_tags()
+            Comment.objects.create(body="comment", author=cls.author, article=article)
+
+        favorite(cls.reader, article)
+
+    def setUp(self):
+        cache.clear()
+        inactive_users.refresh()
+        self.token = get_access_token(self.reader)
+        self.factory = AsyncRequestFactory()
+
+    def get_request(self, path, data=None):
+        return self.factory.get(
+            path, data, headers={"Authorization": f"Token {self.token}"}
+        )
+
+    def get_sync(self, path, data=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+
+        return client.get(path, data)
+
+    async def assert_same_response(self, view, path, data=None, **kwargs):
+        sync_response = await sync_to_async(self.get_sync)(path, data)
+        response = await view(self.get_request(path, data), **kwargs)
+
+        self.assertEqual(response.status_code, sync_response.status_code)
+        self.assertEqual(response.content, sync_response.content)
+        self.assertEqual(response.get("ETag"), sync_response.get("ETag"))
+
+    async def test_article_list(self):
+        await self.assert_same_response(async_views.article_list, "/api/articles")
+        await self.assert_same_response(
+            async_views.article_list, "/api/articles", {"tag": "tag", "limit": 2}
+        )
+        await self.assert_same_response(
+            async_views.article_list, "/api/articles", {"cursor": "", "limit": 2}
+        )
+        await self.assert_same_response(
+            async_views.article_list, "/api/articles", {"view": "summary"}
+        )
+        await self.assert_same_response(
+            async_views.article_list, "/api/articles", {"view": "unknown"}
+        )
+
+    async def test_article_detail(self):
+        await self.assert_same_response(
+            async_views.article_detail, "/api/articles/article-2", slug="article-2"
+        )
+
+    async def test_profile(self):
+        await self.assert_same_response(
+            async_views.profile_detail, "/api/profiles/author", username="author"
+        )
+        await self.assert_same_response(
+            async_views.profile_detail, "/api/profiles/missing", username="missing"
+        )
+
+    async def test_comment_list(self):
+        await self.assert_same_response(
+            async_views.comment_list,
+            "/api/articles/article-0/comments",
+            slug="article-0",
+        )
+        await self.assert_same_response(
+            async_views.comment_list,
+            "/api/articles/article-0/comments",
+            {"cursor": "", "limit": 1},
+            slug="article-0",
+        )
+        await self.assert_same_response(
+            async_views.comment_list,
+            "/api/articles/missing/comments",
+            slug="missing",
+        )
+
+    async def test_authentication_required(self):
+        response = await async_views.profile_detail(
+            AsyncRequestFactory().get("/api/profiles/author"), username="author"
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Token realm="api"')
+
+    async def test_not_found(self):
+        response = await async_views.article_detail(
+            self.get_request("/api/articles/missing"), slug="missing"
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncAuthViewsTest(TransactionTestCase):
+    # Hashing runs on other threads, which don't see uncommitted data.
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+
+    def post_request(self, path, data):
+        return AsyncRequestFactory().post(
+            path, {"user": data}, content_type="application/json"
+        )
+
+    async def assert_same_response(self, view, path, data):
+        sync_response = await sync_to_async(APIClient().post)(
+            path, {"user": data}, format="json"
+        )
+        response = await view(self.post_request(path, data))
+
+        self.assertEqual(response.status_code, sync_response.status_code)
+        self.assertEqual(response.content, sync_response.content)
+
+    async def test_login(self):
+        await self.assert_same_response(
+            async_views.login,
+            "/api/users/login",
+            {"email": "user@example.com", "password": "password"},
+        )
+
+    async def test_register(self):
+        data = {"email": "new@example.com", "password": "password", "username": "new"}
+        response = await async_views.register(self.post_request("/api/users", data))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)["user"]["username"], "new")
+        user = await User.objects.aget(username="new")
+        self.assertTrue(await sync_to_async(user.check_password)("password"))
+
+        await self.assert_same_response(async_views.register, "/api/users", data)
+
+    async def test_parse_error(self):
+        response = await async_views.login(
+            AsyncRequestFactory().post(
+                "/api/users/login", "{", content_type="application/json"
+            )
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=2)
+    async def test_hashing_workers(self):
+        self.addCleanup(setattr, hashers, "_executor", None)
+        self.addCleanup(lambda: hashers._executor.shutdown())
+
+        thread = await hashers.offload(threading.current_thread)
+
+        self.assertTrue(thread.name.startswith("password-hashing"))
+        await self.assert_same_response(
+            async_views.login,
+            "/api/users/login",
+            {"email": "user@example.com", "password": "password"},
+        )
+
+
+class FavoritesCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        cls.popular = Article.objects.create(
+            title="Popular",
+            description="description",
+            body="body",
+            author=cls.user,
+            slug="popular",
+        )
+        cls.recent = Article.objects.create(
+            title="Recent",
+            description="description",
+            body="body",
+            author=cls.user,
+            slug="recent",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_favorite_and_unfavorite_update_the_count(self):
+        response = self.client.post("/api/articles/popular/favorite")
+        self.assertEqual(response.data["article"]["favoritesCount"], 1)
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.favorites_count, 1)
+
+        response = self.client.delete("/api/articles/popular/favorite")
+        self.assertEqual(response.data["article"]["favoritesCount"], 0)
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.favorites_count, 0)
+
+    def test_stale_save_keeps_the_count(self):
+        stale = Article.objects.get(pk=self.popular.pk)
+        favorite(self.user, Article.objects.get(pk=self.popular.pk))
+
+        stale.description = "edited"
+        stale.save()
+
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.description, "edited")
+        self.assertEqual(self.popular.favorites_count, 1)
+
+        self.client.put(
+            "/api/articles/popular",
+            {"article": {"body": "edited"}},
+            format="json",
+        )
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.favorites_count, 1)
+
+    def test_most_favorited_ordering(self):
+        favorite(self.user, self.popular)
+
+        response = self.client.get("/api/articles", {"ordering": "-favoritesCount"})
+
+        self.assertEqual(
+            [a["title"] for a in response.data["articles"]], ["Popular", "Recent"]
+        )
+        self.assertEqual(
+            self.client.get("/api/articles", {"ordering": "title"}).status_code, 400
+        )
+
+    def test_reconcile_favorites_count(self):
+        ArticleFavorited.objects.create(article=self.popular, user=self.user)
+        Article.objects.update(favorites_count=7)
+        stdout = StringIO()
+
+        call_command("reconcile_favorites_count", stdout=stdout)
+
+        self.assertEqual(
+            dict(Article.objects.values_list("title", "favorites_count")),
+            {"Popular": 1, "Recent": 0},
+        )
+        self.assertIn("2 articles", stdout.getvalue())
+
+
+class FollowFavoriteIdempotencyTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        cls.article = Article.objects.create(
+            title="Article",
+            description="description",
+            body="body",
+            author=cls.author,
+            slug="article",
+        )
+
+    def setUp(self):
+        inactive_users.refresh()
+        self.client = APIClient()
+        # Authenticated like real requests, the user is never loaded.
+        token = get_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    def test_duplicates_are_rejected(self):
+        favorite(self.user, self.article)
+
+        with self.assertRaises(IntegrityError):
+            ArticleFavorited.objects.create(article=self.article, user=self.user)
+
+    def test_repeated_requests(self):
+        for _ in range(2):
+            response = self.client.post("/api/articles/article/favorite")
+            self.assertTrue(response.data["article"]["favorited"])
+            response = self.client.post("/api/profiles/author/follow")
+            self.assertTrue(response.data["profile"]["following"])
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.favorites_count, 1)
+        self.assertEqual(FollowingUser.objects.count(), 1)
+
+        for _ in range(2):
+            response = self.client.delete("/api/articles/article/favorite")
+            self.assertEqual(response.data["article"]["favoritesCount"], 0)
+            response = self.client.delete("/api/profiles/author/follow")
+            self.assertFalse(response.data["profile"]["following"])
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.favorites_count, 0)
+        self.assertFalse(FollowingUser.objects.exists())
+
+    def assert_statements(self, statements, method, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path)
+
+        self.assertEqual(response.status_code, 200)
+        # Savepoints only show up because the test runs inside a transaction.
+        self.assertEqual(
+            [
+                query["sql"].split()[0]
+                for query in queries
+                if "SAVEPOINT" not in query["sql"]
+            ],
+            statements,
+        )
+
+        return response.data
+
+    def test_favorite_statements(self):
+        # the article with its author, the favorite, the counter
+        data = self.assert_statements(
+            ["SELECT", "INSERT", "UPDATE"], "post", "/api/articles/article/favorite"
+        )
+        self.assertEqual(data["article"]["favoritesCount"], 1)
+        self.assertFalse(data["article"]["author"]["following"])
+
+        self.assert_statements(
+            ["SELECT", "DELETE", "UPDATE"], "delete", "/api/articles/article/favorite"
+        )
+
+    def test_follow_statements(self):
+        data = self.assert_statements(
+            ["SELECT", "INSERT"], "post", "/api/profiles/author/follow"
+        )
+        self.assertTrue(data["profile"]["following"])
+
+        # The profile was cached by the first request.
+        self.assert_statements(["DELETE"], "delete", "/api/profiles/author/follow")
+
+    def test_writing_an_article_does_not_follow_its_author(self):
+        response = self.client.post(
+            "/api/articles",
+            {"article": {"title": "Mine", "description": "d", "body": "b"}},
+            format="json",
+        )
+
+        self.assertFalse(response.data["article"]["author"]["following"])
+        self.assertFalse(FollowingUser.objects.exists())
+
+
+class FollowFavoriteErrorsTest(TransactionTestCase):
+    def test_other_integrity_errors_are_raised(self):
+        user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        gone = User(pk=user.pk + 1, username="gone")
+
+        with self.assertRaises(IntegrityError):
+            follow(user, gone)
+        with self.assertRaises(IntegrityError):
+            favorite(user, Article(pk=1, slug="gone"))
+
+        self.assertFalse(FollowingUser.objects.exists())
+        self.assertFalse(ArticleFavorited.objects.exists())
+
+
+class ConcurrentFavoriteTest(TransactionTestCase):
+    def test_concurrent_favorites(self):
+        # SQLite only takes concurrent connections to a file, see the TEST
+        # NAME in settings.
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("in-memory SQLite test database")
+
+        user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        article = Article.objects.create(
+            title="Article",
+            description="description",
+            body="body",
+            author=user,
+            slug="article",
+        )
+
+        def post(_):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                return client.post("/api/articles/article/favorite").status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(post, range(32)))
+
+        self.assertEqual(statuses, [200] * 32)
+        article.refresh_from_db()
+        self.assertEqual(article.favorites_count, 1)
+        self.assertEqual(ArticleFavorited.objects.count(), 1)
+
+
+class RequestLoaderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        cls.commenters = [
+            User.objects.create_user(
+                email=f"commenter{i}@example.com",
+                password="password",
+                username=f"commenter{i}",
+            )
+            for i in range(2)
+        ]
+        FollowingUser.objects.create(user=cls.reader, following=cls.commenters[0])
+        cls.article = Article.objects.create(
+            title="Article",
+            slug="article",
+            description="description",
+            body="body",
+            author=cls.commenters[0],
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def add_comments(self, count):
+        Comment.objects.bulk_create(
+            Comment(body="comment", author=self.commenters[i % 2], article=self.article)
+            for i in range(count)
+        )
+
+    def test_comment_thread_query_count(self):
+        # the comments joined with their article, authors and follow flags
+        self.add_comments(4)
+        with self.assertNumQueries(1):
+            self.client.get("/api/articles/article/comments")
+
+        self.add_comments(16)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/articles/article/comments")
+
+        self.assertEqual(len(response.data["comments"]), 20)
+        self.assertEqual(
+            {
+                (c["author"]["username"], c["author"]["following"])
+                for c in response.data["comments"]
+            },
+            {("commenter0", True), ("commenter1", False)},
+        )
+
+    def test_lookups_are_batched_and_memoized(self):
+        favorite(self.reader, self.article)
+        loader = RequestLoader(self.reader)
+
+        with self.assertNumQueries(3):
+            loader.prime_authors(
+                Comment(author_id=commenter.pk) for commenter in self.commenters
+            )
+            loader.prime_favorited([self.article])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(loader.is_following(self.commenters[0]))
+            self.assertFalse(loader.is_following(self.commenters[1]))
+            self.assertTrue(loader.is_favorited(self.article))
+
+    def test_anonymous_checks_do_not_query(self):
+        loader = RequestLoader(AnonymousUser())
+
+        with self.assertNumQueries(0):
+            self.assertFalse(loader.is_following(self.commenters[0]))
+            self.assertFalse(loader.is_favorited(self.article))
+
+
+class CommentListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password", username="user"
+        )
+        cls.article = Article.objects.create(
+            title="Article",
+            description="description",
+            body="body",
+            author=cls.user,
+            slug="article",
+        )
+        Article.objects.create(
+            title="Empty",
+            description="description",
+            body="body",
+            author=cls.user,
+            slug="empty",
+        )
+        Comment.objects.bulk_create(
+            Comment(body=f"Comment {i}", author=cls.user, article=cls.article)
+            for i in range(5)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_bodies(self, response):
+        return [comment["body"] for comment in response.data["comments"]]
+
+    def test_oldest_first(self):
+        response = self.client.get("/api/articles/article/comments")
+
+        self.assertEqual(self.get_bodies(response), [f"Comment {i}" for i in range(5)])
+        self.assertNotIn("nextCursor", response.data)
+
+    def test_cursor_pagination(self):
+        bodies = []
+        cursor = ""
+
+        while cursor is not None:
+            response = self.client.get(
+                "/api/articles/article/comments", {"cursor": cursor, "limit": 2}
+            )
+            bodies += self.get_bodies(response)
+            cursor = response.data["nextCursor"]
+
+        self.assertEqual(bodies, [f"Comment {i}" for i in range(5)])
+
+    def test_cursor_needs_a_positive_limit(self):
+        response = self.client.get(
+            "/api/articles/article/comments", {"cursor": "", "limit": 0}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_empty_and_missing_article(self):
+        response = self.client.get("/api/articles/empty/comments")
+        self.assertEqual(response.data, {"comments": []})
+
+        response = self.client.get("/api/articles/missing/comments")
+        self.assertEqual(response.status_code, 404)
+
+
+class ArticleDetailCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        FollowingUser.objects.create(user=cls.reader, following=cls.author)
+        cls.article = Article.objects.create(
+            title="Article",
+            description="description",
+            body="body",
+            author=cls.author,
+            slug="article",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, slug="article"):
+        return self.client.get(f"/api/articles/{slug}")
+
+    def test_cached_reads(self):
+        with self.assertNumQueries(1):
+            first = self.get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().data, first.data)
+
+        favorite(self.reader, self.article)
+        self.client.force_authenticate(self.reader)
+        self.get()
+
+        # only the viewer's flags
+        with self.assertNumQueries(1):
+            data = self.get().data["article"]
+
+        self.assertTrue(data["favorited"])
+        self.assertTrue(data["author"]["following"])
+        self.assertEqual(data["favoritesCount"], 1)
+
+        self.client.force_authenticate(self.author)
+        data = self.get().data["article"]
+        self.assertFalse(data["favorited"])
+        self.assertFalse(data["author"]["following"])
+
+    def test_favorite_invalidates(self):
+        self.get()
+
+        self.client.force_authenticate(self.reader)
+        self.client.post("/api/articles/article/favorite")
+
+        self.assertEqual(self.get().data["article"]["favoritesCount"], 1)
+
+    def test_update_and_delete_invalidate(self):
+        self.get()
+
+        self.client.force_authenticate(self.author)
+        response = self.client.put(
+            "/api/articles/article",
+            {"article": {"title": "Renamed"}},
+            format="json",
+        )
+        slug = response.data["article"]["slug"]
+
+        self.assertEqual(self.get().status_code, 404)
+        self.assertEqual(self.get(slug).data["article"]["title"], "Renamed")
+
+        self.client.delete(f"/api/articles/{slug}")
+        self.assertEqual(self.get(slug).status_code, 404)
+
+    def test_author_change_invalidates(self):
+        self.get()
+
+        self.author.bio = "New bio"
+        self.author.save()
+
+        self.assertEqual(self.get().data["article"]["author"]["bio"], "New bio")
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+
+        for i in range(3):
+            article = Article.objects.create(
+                title=f"Article {i}",
+                slug=f"article-{i}",
+                description="description",
+                body="body",
+                author=cls.author,
+            )
+            Comment.objects.create(body="comment", author=cls.author, article=article)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def assert_not_modified(self, path, data=None, num_queries=None):
+        response = self.client.get(path, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Authorization", response["Vary"])
+        etag = response["ETag"]
+
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(path, data, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        return etag
+
+    def assert_modified(self, path, etag, data=None):
+        response = self.client.get(path, data, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_article_list(self):
+        # the validators, the count is cached
+        etag = self.assert_not_modified("/api/articles", num_queries=1)
+        self.assert_not_modified("/api/articles", {"cursor": "", "limit": 2}, 1)
+
+        favorite(self.reader, Article.objects.get(slug="article-0"))
+        self.assert_modified("/api/articles", etag)
+
+    def test_article_list_profile_change(self):
+        etag = self.assert_not_modified("/api/articles", num_queries=1)
+
+        self.author.bio = "New bio"
+        self.author.save()
+
+        self.assert_modified("/api/articles", etag)
+
+    def test_article_detail(self):
+        self.assert_not_modified("/api/articles/article-0", num_queries=1)
+
+        self.client.force_authenticate(None)
+        etag = self.assert_not_modified("/api/articles/article-0", num_queries=0)
+
+        article = Article.objects.get(slug="article-0")
+        article.body = "Edited"
+        article.save()
+
+        self.assert_modified("/api/articles/article-0", etag)
+
+    def test_comment_list(self):
+        path = "/api/articles/article-0/comments"
+        etag = self.assert_not_modified(path, num_queries=1)
+
+        follow(self.reader, self.author)
+        self.assert_modified(path, etag)
+
+    def test_profile(self):
+        etag = self.assert_not_modified("/api/profiles/author", num_queries=1)
+
+        follow(self.reader, self.author)
+        self.assert_modified("/api/profiles/author", etag)
+
+
+class ORJSONRendererTest(TestCase):
+    def render_both(self, data, accepted_media_type=None):
+        return (
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def assert_same_output(self, data, accepted_media_type=None):
+        output, expected = self.render_both(data, accepted_media_type)
+
+        self.assertEqual(output, expected)
+
+    def test_golden_output(self):
+        data = {
+            "text": 'zażółć \u2028\u2029 😀 "quoted"',
+            "createdAt": datetime(
+                2024, 5, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc
+            ),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "price": Decimal("1.5"),
+            "tags": ("a", "b"),
+            1: None,
+        }
+
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            b'{"text":"za\xc5\xbc\xc3\xb3\xc5\x82\xc4\x87 \\u2028\\u2029 '
+            b'\xf0\x9f\x98\x80 \\"quoted\\"",'
+            b'"createdAt":"2024-05-01T12:30:05.123456Z",'
+            b'"id":"12345678-1234-5678-1234-567812345678",'
+            b'"price":1.5,"tags":["a","b"],"1":null}',
+        )
+        self.assert_same_output(data)
+
+    def test_same_output_as_json_renderer(self):
+        for data in [
+            [],
+            {},
+            {"nested": OrderedDict([("b", [1, True, None]), ("a", {"c": ""})])},
+            [
+                datetime(2024, 5, 1, 12, 30),
+                datetime(2024, 5, 1, tzinfo=dt_timezone.utc),
+            ],
+            [datetime(2024, 5, 1, tzinfo=dt_timezone(timedelta(hours=2)))],
+            [date(2024, 5, 1), time(12, 30, 1, 5), timedelta(seconds=90)],
+            [gettext_lazy("active"), 2**63 - 1, -(2**63)],
+            # beyond orjson's 64 bit integers
+            [2**70],
+        ]:
+            with self.subTest(data=data):
+                self.assert_same_output(data)
+
+    def test_indent(self):
+        self.assert_same_output({"a": [1]}, "application/json; indent=4")
+
+    def test_api_responses(self):
+        author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        Article.objects.create(
+            title="Zażółć",
+            description="description",
+            body="body",
+            author=author,
+            slug="zazoc",
+        )
+        client = APIClient()
+
+        for path in ["/api/articles", "/api/articles/zazoc", "/api/tags"]:
+            with self.subTest(path=path):
+                response = client.get(path)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class ORJSONParserTest(TestCase):
+    def parse(self, parser, body):
+        return parser.parse(BytesIO(body), "application/json")
+
+    def test_same_result_as_json_parser(self):
+        for body in [
+            b'{"article": {"title": "Za\xc5\xbc\xc3\xb3\xc5\x82\xc4\x87"}}',
+            b"[1, 2.5, true, null]",
+            b'"\\ud800"',
+            b"123456789012345678901234567890",
+            b'{"n": -9999999999999999999}',
+            b"  {}  ",
+        ]:
+            with self.subTest(body=body):
+                # repr() tells an int from an equal float.
+                self.assertEqual(
+                    repr(self.parse(ORJSONParser(), body)),
+                    repr(self.parse(JSONParser(), body)),
+                )
+
+    def test_same_errors_as_json_parser(self):
+        for body in [b"{", b"NaN", b"", b'{"a": 1,}']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(JSONParser(), body)
+                with self.assertRaises(ParseError) as error:
+                    self.parse(ORJSONParser(), body)
+
+                self.assertEqual(str(error.exception), str(expected.exception))
+
+
+class StreamingArticleListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        Article.objects.bulk_create(
+            Article(
+                title=f"Article {i}",
+                slug=f"article-{i}",
+                description="description",
+                body="Zażółć gęślą jaźń. " * 1000,
+                author=cls.author,
+            )
+            for i in range(100)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, **params):
+        return self.client.get("/api/articles", params, HTTP_ACCEPT_ENCODING="")
+
+    @override_settings(ARTICLE_LIST_STREAMING_LIMIT=5)
+    def test_same_bytes_as_rendered(self):
+        for params in [
+            {"limit": 10},
+            {"limit": 10, "offset": 95},
+            {"limit": 10, "cursor": ""},
+            {"limit": 200, "cursor": ""},
+        ]:
+            with self.subTest(params=params):
+                response = self.get(**params)
+                self.assertTrue(response.streaming)
+                streamed = b"".join(response.streaming_content)
+
+                with self.settings(ARTICLE_LIST_STREAMING_LIMIT=None):
+                    rendered = self.get(**params)
+
+                self.assertFalse(rendered.streaming)
+                self.assertEqual(streamed, rendered.content)
+
+    def test_peak_memory_does_not_grow_with_the_page(self):
+        def peak(limit):
+            tracemalloc.start()
+            try:
+                response = self.get(limit=limit)
+
+                if response.streaming:
+                    for chunk in response.streaming_content:
+                        pass
+
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        with self.settings(ARTICLE_LIST_STREAMING_LIMIT=None):
+            rendered = peak(100) - peak(60)
+
+        with self.settings(ARTICLE_LIST_STREAMING_LIMIT=0):
+            peak(1)
+            streamed = peak(100) - peak(60)
+
+        # What the last 40 articles add to the peak. Rendered, the whole page
+        # is in memory at once. Streamed, the peak levels off once a few
+        # chunks of rows are in flight, whatever the page size; a chunk left
+        # for the garbage collector can still show up.
+        self.assertGreater(rendered, len(self.get(limit=40).content))
+        self.assertLess(streamed, rendered / 2)
+
+
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        for i in range(3):
+            Article.objects.create(
+                title=f"Article {i}",
+                description="description",
+                body="body " * 200,
+                author=author,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.plain = self.client.get("/api/articles", HTTP_ACCEPT_ENCODING="").content
+
+    def get(self, accept_encoding, **params):
+        response = self.client.get(
+            "/api/articles", params, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+
+        if response.streaming:
+            return response, b"".join(response.streaming_content)
+
+        return response, response.content
+
+    def test_gzip(self):
+        response, content = self.get("gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(content), self.plain)
+
+    @skipUnless(brotli, "requires brotli")
+    def test_brotli(self):
+        for accept_encoding, expected in [
+            ("gzip, deflate, br", "br"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br", "br"),
+        ]:
+            with self.subTest(accept_encoding=accept_encoding):
+                response, content = self.get(accept_encoding)
+
+                self.assertEqual(response["Content-Encoding"], expected)
+
+        self.assertEqual(brotli.decompress(content), self.plain)
+
+    @skipUnless(brotli, "requires brotli")
+    @override_settings(ARTICLE_LIST_STREAMING_LIMIT=0)
+    def test_brotli_streaming(self):
+        response, content = self.get("br")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(brotli.decompress(content), self.plain)
+
+
+class ArticleSummaryViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+        Article.objects.create(
+            title="Article",
+            description="description",
+            body="body",
+            author=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_default_view_includes_body(self):
+        response = self.client.get("/api/articles")
+
+        self.assertEqual(response.data["articles"][0]["body"], "body")
+
+    def test_summary_view_omits_body(self):
+        full = self.client.get("/api/articles").data["articles"][0]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/articles", {"view": "summary"})
+
+        article = response.data["articles"][0]
+        full.pop("body")
+        self.assertEqual(article, full)
+        self.assertEqual(response.data["articlesCount"], 1)
+        self.assertFalse(
+            any('"api_article"."body"' in query["sql"] for query in queries)
+        )
+
+    def test_summary_view_of_feed(self):
+        reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        follow(reader, self.author)
+        self.client.force_authenticate(reader)
+
+        response = self.client.get("/api/articles/feed", {"view": "summary"})
+
+        self.assertEqual(len(response.data["articles"]), 1)
+        self.assertNotIn("body", response.data["articles"][0])
+
+    def test_unknown_view(self):
+        response = self.client.get("/api/articles", {"view": "compact"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("view", response.data)
+
+
+class ProfileLookupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="Author"
+        )
+        Article.objects.create(
+            title="Article", description="description", body="body", author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_username_lookup(self):
+        self.assertEqual(User.objects.get(pk=self.author.pk).username_lookup, "author")
+
+        self.author.username = "AUTHOR"
+        self.author.save(update_fields=["username"])
+
+        self.assertEqual(User.objects.get(pk=self.author.pk).username_lookup, "author")
+
+    def test_username_is_required(self):
+        with self.assertRaises(ValueError):
+            User.objects.create_user(email="nobody@example.com", password="password")
+
+        with self.assertRaises(IntegrityError):
+            User.objects.bulk_create(
+                [User(email="nobody@example.com", username="", username_lookup="")]
+            )
+
+    def test_case_insensitive_profile(self):
+        response = self.client.get("/api/profiles/aUTHOR")
+
+        self.assertEqual(response.data["profile"]["username"], "Author")
+        self.assertEqual(self.client.get("/api/profiles/nobody").status_code, 404)
+
+    def test_case_insensitive_filters(self):
+        favorite(self.reader, Article.objects.get())
+
+        response = self.client.get("/api/articles", {"author": "author"})
+        self.assertEqual(response.data["articlesCount"], 1)
+
+        response = self.client.get("/api/articles", {"favorited": "READER"})
+        self.assertEqual(response.data["articlesCount"], 1)
+
+    def test_profile_is_cached(self):
+        self.client.get("/api/profiles/author")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/profiles/Author")
+
+        self.assertEqual(response.data["profile"]["username"], "Author")
+
+    def test_update_invalidates_profile(self):
+        self.client.get("/api/profiles/reader")
+        self.client.put(
+            "/api/user",
+            {"user": {"username": "writer", "bio": "Writes now"}},
+            format="json",
+        )
+
+        self.assertEqual(self.client.get("/api/profiles/reader").status_code, 404)
+        response = self.client.get("/api/profiles/writer")
+        self.assertEqual(response.data["profile"]["bio"], "Writes now")
+
+    def test_duplicate_username(self):
+        response = APIClient().post(
+            "/api/users",
+            {
+                "user": {
+                    "username": "AUTHOR",
+                    "email": "other@example.com",
+                    "password": "password",
+                }
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("username", response.data["user"])
+
+        response = self.client.put(
+            "/api/user", {"user": {"username": "author"}}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.put(
+            "/api/user", {"user": {"username": "Reader"}}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ArticleSlugTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com", password="password", username="author"
+        )
+
+    def create_article(self, title):
+        return Article.objects.create(
+            title=title, description="description", body="body", author=self.author
+        )
+
+    def test_same_title(self):
+        first, second = self.create_article("Hello"), self.create_article("Hello")
+
+        self.assertRegex(first.slug, r"^hello-[0-9a-f]{10}$")
+        self.assertNotEqual(first.slug, second.slug)
+
+    def test_long_and_empty_titles(self):
+        article = self.create_article("word " * 30)
+
+        self.assertLessEqual(len(article.slug), 50)
+        self.assertNotIn("--", article.slug)
+        self.assertRegex(self.create_article("!!!").slug, r"^[0-9a-f]{10}$")
+
+    def test_slug_only_changes_with_the_title(self):
+        article = self.create_article("Hello")
+        slug = article.slug
+
+        article = Article.objects.get(pk=article.pk)
+        article.description = "changed"
+        article.save()
+        article.title = "HELLO!"
+        article.save(update_fields=["title"])
+        self.assertEqual(Article.objects.get(pk=article.pk).slug, slug)
+
+        article.title = "Goodbye"
+        article.save(update_fields=["title"])
+        self.assertRegex(Article.objects.get(pk=article.pk).slug, r"^goodbye-")
+
+    def test_slug_is_not_writable(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+
+        response = client.post(
+            "/api/articles",
+            {
+                "article": {
+                    "title": "Hello",
+                    "description": "description",
+                    "body": "body",
+                    "slug": "chosen",
+                }
+            },
+            format="json",
+        )
+        slug = response.data["article"]["slug"]
+        self.assertRegex(slug, r"^hello-")
+
+        response = client.put(
+            f"/api/articles/{slug}", {"article": {"slug": "renamed"}}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["article"]["slug"], slug)
+        self.assertTrue(Article.objects.filter(slug=slug).exists())
+
+    def test_create_runs_no_lookups(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.create_article("Hello")
+
+        self.assertEqual([query["sql"].split()[0] for query in queries], ["INSERT"])
+
+
+class NDJSONCommandsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        author = User.objects.create_user(
+            email="author@example.com",
+            password="password",
+            username="Author",
+            bio="Writes",
+        )
+        follow(reader, author)
+
+        for i in range(3):
+            article = Article.objects.create(
+                title=f"Article {i}",
+                description="description",
+                body="body",
+                tagList=["django", f"tag{i}"],
+                author=author,
+            )
+            article.sync_tags()
+            Comment.objects.create(body="comment", author=reader, article=article)
+
+        favorite(reader, article)
+
+    def export(self):
+        stdout = StringIO()
+        call_command("export_ndjson", stdout=stdout)
+
+        return stdout.getvalue()
+
+    def import_(self, content, **options):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+
+        call_command("import_ndjson", f.name, stdout=StringIO(), **options)
+
+    def clear(self):
+        ArticleFavorited.objects.all().delete()
+        Comment.objects.all().delete()
+        Article.objects.all().delete()
+        FollowingUser.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_round_trip(self):
+        exported = self.export()
+        kinds = [json.loads(line)["type"] for line in exported.splitlines()]
+        self.assertEqual(
+            kinds,
+            ["user"] * 2 + ["article"] * 3 + ["comment"] * 3 + ["follow", "favorite"],
+        )
+
+        self.clear()
+        self.import_(exported, batch_size=2, workers=1)
+
+        self.assertEqual(self.export(), exported)
+        self.assertEqual(
+            Article.objects.get(
+                slug=json.loads(exported.splitlines()[4])["slug"]
+            ).favorites_count,
+            1,
+        )
+        self.assertEqual(
+            dict(Tag.objects.values_list("name", "articles_count")),
+            {"django": 3, "tag0": 1, "tag1": 1, "tag2": 1},
+        )
+        self.assertEqual(User.objects.get(username="Author").username_lookup, "author")
+        self.assertTrue(User.objects.get(username="reader").check_password("password"))
+
+    def test_plain_passwords_and_slugs(self):
+        records = [
+            {
+                "type": "user",
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password": f"secret{i}",
+            }
+            for i in range(3)
+        ] + [
+            {
+                "type": "article",
+                "title": "Same",
+                "description": "d",
+                "body": "b",
+                "author": "user0",
+            }
+            for i in range(2)
+        ]
+        content = "".join(json.dumps(record) + "\n" for record in records)
+
+        self.import_(content, workers=1)
+
+        self.assertTrue(User.objects.get(username="user2").check_password("secret2"))
+        slugs = Article.objects.filter(title="Same").values_list("slug", flat=True)
+        self.assertEqual(len(set(slugs)), 2)
+
+    def test_password_pool(self):
+        records = [
+            {
+                "type": "user",
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password": f"secret{i}",
+            }
+            for i in range(2)
+        ]
+
+        self.import_(
+            "".join(json.dumps(record) + "\n" for record in records), workers=2
+        )
+
+        self.assertTrue(User.objects.get(username="user1").check_password("secret1"))
+
+    def test_unknown_reference(self):
+        content = json.dumps(
+            {"type": "follow", "user": "reader", "following": "nobody"}
+        )
+
+        with self.assertRaisesMessage(CommandError, "nobody"):
+            self.import_(content, workers=1)
+
+
+class RequestProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email="reader@example.com", password="password", username="reader"
+        )
+        for i in range(3):
+            Article.objects.create(
+                title=f"Article {i}",
+                description="description",
+                body="body",
+                author=cls.reader,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {get_access_token(self.reader)}"
+        )
+
+    def test_off_by_default(self):
+        response = self.client.get("/api/articles")
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(
+        REQUEST_PROFILING_SAMPLE_RATE=1,
+        REQUEST_PROFILING_SERVER_TIMING=True,
+        INTERNAL_IPS=["127.0.0.1"],
+    )
+    def test_profiled_request(self):
+        with self.assertLogs("api.profiling", "INFO") as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/api/articles")
+
+        metrics = [
+            metric.split(";")[0] for metric in response["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(metrics, ["db", "auth", "serialize", "render", "total"])
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], "/api/articles")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], len(queries))
+        self.assertEqual(record["duplicate_queries"], 0)
+        self.assertGreater(record["serialize_ms"], 0)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1)
+    def test_server_timing_is_internal(self):
+        for overrides in [
+            {},
+            {"REQUEST_PROFILING_SERVER_TIMING": True},
+            {"INTERNAL_IPS": ["127.0.0.1"]},
+        ]:
+            with self.subTest(**overrides), self.settings(**overrides):
+                with self.assertLogs("api.profiling", "INFO"):
+                    response = self.client.get("/api/articles")
+
+                self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(
+        REQUEST_PROFILING_SAMPLE_RATE=1,
+        REQUEST_PROFILING_SERVER_TIMING=True,
+        INTERNAL_IPS=["127.0.0.1"],
+    )
+    async def test_async_request(self):
+        with self.assertLogs("api.profiling", "INFO"):
+            response = await AsyncClient().get("/api/tags")
+
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    def test_duplicate_queries(self):
+        profiling.install(connection)
+
+        with profiling.profile_request() as profile:
+            for _ in range(3):
+                list(User.objects.filter(pk=self.reader.pk))
+            list(User.objects.filter(pk=0))
+
+        self.assertEqual(profile.query_count, 4)
+        self.assertEqual(len(profile.duplicate_queries()), 1)
+        self.assertEqual(profile.as_dict(0)["duplicate_queries"], 2)
+        self.assertIn('desc="4 queries (2 duplicates)"', profile.server_timing(0))
+
+    def test_batches_are_not_duplicates(self):
+        profiling.install(connection)
+        sql = f"UPDATE {Tag._meta.db_table} SET articles_count = 0 WHERE name = %s"
+
+        with profiling.profile_request() as profile:
+            with connection.cursor() as cursor:
+                for _ in range(2):
+                    cursor.executemany(sql, [[f"tag{i}"] for i in range(100)])
+
+        self.assertEqual(profile.query_count, 2)
+        self.assertEqual(profile.duplicate_queries(), [])
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class AccessTokenCache:
+    """Bounded LRU of issued access tokens keyed by user id and password hash.
+
+    A token is handed out again as long as more than half of its lifetime is
+    left, so rendering the same user repeatedly does not sign a new token
+    every time. Changing the password changes the key, which stops reuse of
+    tokens issued before.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_key(self, user):
+        return user.pk, hashlib.md5(user.password.encode()).hexdigest()
+
+    def get(self, user):
+        key = self.get_key(user)
+        now = timezone.now()
+
+        with self.lock:
+            cached = self.tokens.get(key)
+
+            if cached is not None:
+                token, reuse_until = cached
+
+                if now < reuse_until:
+                    self.tokens.move_to_end(key)
+                    return token
+
+        access = AccessToken.for_user(user)
+        token = str(access)
+        reuse_until = now + api_settings.ACCESS_TOKEN_LIFETIME / 2
+
+        with self.lock:
+            self.tokens[key] = (token, reuse_until)
+            self.tokens.move_to_end(key)
+
+            while len(self.tokens) > self.maxsize:
+                self.tokens.popitem(last=False)
+
+        return token
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+
+
+access_tokens = AccessTokenCache(getattr(settings, "ACCESS_TOKEN_CACHE_SIZE", 1024))
+
+
+def get_access_token(user):
+    return access_tokens.get(user)
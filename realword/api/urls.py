@@ -1,4 +1,14 @@
 from django.urls import path
+from .async_views import (
+    with_async_get,
+    with_async_post,
+    register,
+    login,
+    article_list,
+    article_detail,
+    profile_detail,
+    comment_list,
+)
 from .views import (
     RegisterView,
     LoginView,
@@ -6,21 +16,34 @@ from .views import (
     ProfileView,
     ProfileFollowView,
     ArticleView,
+    ArticleFeedView,
     ArticleDetailView,
     ArticleFavoriteView,
     CommentView,
+    TagView,
 )
 
 
 urlpatterns = [
-    path("users", RegisterView.as_view()),
-    path("users/login", LoginView.as_view()),
+    path("users", with_async_post(RegisterView.as_view(), register)),
+    path("users/login", with_async_post(LoginView.as_view(), login)),
     path("user", UserView.as_view()),
-    path("profiles/<str:username>", ProfileView.as_view()),
+    path(
+        "profiles/<str:username>",
+        with_async_get(ProfileView.as_view(), profile_detail),
+    ),
     path("profiles/<str:username>/follow", ProfileFollowView.as_view()),
-    path("articles", ArticleView.as_view()),
-    path("articles/<str:slug>", ArticleDetailView.as_view()),
+    path("articles", with_async_get(ArticleView.as_view(), article_list)),
+    path("articles/feed", ArticleFeedView.as_view()),
+    path(
+        "articles/<str:slug>",
+        with_async_get(ArticleDetailView.as_view(), article_detail),
+    ),
     path("articles/<str:slug>/favorite", ArticleFavoriteView.as_view()),
-    path("articles/<str:slug>/comments", CommentView.as_view()),
+    path(
+        "articles/<str:slug>/comments",
+        with_async_get(CommentView.as_view(), comment_list),
+    ),
     path("articles/<str:slug>/comments/<int:id>", CommentView.as_view()),
+    path("tags", TagView.as_view()),
 ]
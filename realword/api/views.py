@@ -6,12 +6,44 @@ from .serializers import (
     ProfileSerializer,
     ArticleSerializer,
     CommentSerializer,
+    get_article_list_serializer,
 )
+from .pagination import (
+    ARTICLE_ORDERINGS,
+    get_article_ordering,
+    cursor_page,
+    encode_cursor,
+    split_page,
+)
+from .conditional import (
+    ARTICLE_VALIDATOR_FIELDS,
+    COMMENT_VALIDATOR_FIELDS,
+    article_validator,
+    comment_validator,
+    has_validators,
+    make_etag,
+    not_modified,
+    set_etag,
+)
+from .cache import (
+    get_articles_count,
+    get_popular_tags,
+    get_article_detail,
+    set_article_detail,
+    get_profile,
+    invalidate_profile,
+)
+from .feeds import get_feed
+from .services import follow, unfollow, favorite, unfavorite
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from rest_framework import status
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
@@ -84,7 +116,10 @@ class UserView(APIView):
         serializer = UserSerializer(request.user, request.data["user"], partial=True)
 
         if serializer.is_valid():
+            username = request.user.username
             serializer.save()
+            invalidate_profile(username, serializer.instance.username)
+
             return Response(
                 {self.wrapper_key: serializer.data}, status=status.HTTP_200_OK
             )
@@ -98,14 +133,20 @@ class ProfileView(CreateAPIView):
     lookup_field = "username"
 
     def get_object(self):
-        username = self.kwargs[self.lookup_field]
+        profile = get_profile(self.kwargs[self.lookup_field])
+
+        if profile is None:
+            raise NotFound()
 
-        return User.objects.get(username=username)
+        return profile
 
     def get(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
-        return Response({"profile": serializer.data})
+        etag = make_etag(serializer.data)
+        response = not_modified(request, etag) or Response({"profile": serializer.data})
+
+        return set_etag(response, etag)
 
 
 class ProfileFollowView(APIView):
@@ -114,21 +155,28 @@ class ProfileFollowView(APIView):
     lookup_field = "username"
 
     def get_object(self):
-        username = self.kwargs[self.lookup_field]
+        profile = get_profile(self.kwargs[self.lookup_field])
+
+        if profile is None:
+            raise NotFound()
 
-        return User.objects.get(username=username)
+        return profile
 
-    def get_serializer(self, *args, **kwargs):
-        context = {"request": self.request}
+    def get_serializer(self, *args, following, **kwargs):
+        context = {"request": self.request, "following": following}
         return self.serializer_class(*args, context=context, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        serializer = self.get_serializer(instance=self.get_object())
+        profile = self.get_object()
+        follow(request.user, profile)
+        serializer = self.get_serializer(instance=profile, following=True)
 
         return Response({"profile": serializer.data}, status=status.HTTP_200_OK)
 
     def delete(self, request, *args, **kwargs):
-        serializer = self.get_serializer(instance=self.get_object())
+        profile = self.get_object()
+        unfollow(request.user, profile)
+        serializer = self.get_serializer(instance=profile, following=False)
 
         return Response({"profile": serializer.data}, status=status.HTTP_200_OK)
 
@@ -139,51 +187,136 @@ class ArticleView(CreateAPIView, ListAPIView, GenericAPIView):
 
     article_limit = 20
     article_offset = 0
+    # Rows fetched per round trip when streaming, bounds the memory used.
+    stream_chunk_size = 20
+
+    def get_filters(self):
+        return {
+            "tag": self.request.GET.get("tag"),
+            "author": self.request.GET.get("author"),
+            "favorited": self.request.GET.get("favorited"),
+        }
 
     def get_queryset(self):
-        tag = self.request.GET.get("tag")
-        author = self.request.GET.get("author")
-        favorited = self.request.GET.get("favorited")
-        limit = int(self.request.GET.get("limit", self.article_limit))
-        offset = int(self.request.GET.get("offset", self.article_offset))
+        queryset = Article.objects.for_list(self.request.user).filter_by(
+            **self.get_filters()
+        )
 
-        queryset = Article.objects.all()
+        return queryset.order_by(*get_article_ordering(self.request.GET))
 
-        if tag:
-            queryset = queryset.filter(tagList__icontains=tag)
+    def get_articles_count(self):
+        filters = self.get_filters()
+        # Counted on a plain queryset, the list annotations would only slow
+        # the COUNT down.
+        queryset = Article.objects.filter_by(**filters)
 
-        if author:
-            author_obj = User.objects.filter(username=author).first()
+        return get_articles_count(queryset, **filters)
 
-            queryset = queryset.filter(author=author_obj)
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return get_article_list_serializer(self.request.GET)
 
-        if favorited:
-            fav_by_user = User.objects.filter(username=favorited).first()
+        return super().get_serializer_class()
 
-            favorite_articles = ArticleFavorited.objects.filter(
-                user=fav_by_user
-            ).values("article")
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
 
-            queryset = queryset.filter(pk__in=favorite_articles)
+        if "body" not in self.get_serializer_class().Meta.fields:
+            queryset = queryset.defer("body")
+        limit = int(request.GET.get("limit", self.article_limit))
+        cursor = request.GET.get("cursor")
 
-        queryset = queryset.order_by("-createdAt")
+        if cursor is None:
+            offset = int(request.GET.get("offset", self.article_offset))
+            page_queryset = queryset[offset : limit + offset]
+        else:
+            page_queryset = cursor_page(queryset, cursor, limit)
 
-        limited_queryset = queryset[offset : limit + offset]
+        articles_count = self.get_articles_count()
 
-        queryset_count = limited_queryset.count()
+        if has_validators(request):
+            validators = list(page_queryset.values_list(*ARTICLE_VALIDATOR_FIELDS))
+            has_next = cursor is not None and len(validators) > limit
+            etag = make_etag(validators[:limit], has_next, articles_count)
 
-        return limited_queryset, queryset_count
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
 
-    def get(self, request, *args, **kwargs):
-        queryset, queryset_count = self.filter_queryset(self.get_queryset())
+        if self.should_stream(limit):
+            return self.get_streaming_response(
+                page_queryset, limit, articles_count, paginated=cursor is not None
+            )
+
+        if cursor is None:
+            page, next_cursor = list(page_queryset), None
+        else:
+            page, next_cursor = split_page(list(page_queryset), limit)
+
+        etag = make_etag(
+            [article_validator(article) for article in page],
+            next_cursor is not None,
+            articles_count,
+        )
+        serializer = self.get_serializer(page, many=True)
+        data = {"articles": serializer.data, "articlesCount": articles_count}
+
+        if cursor is not None:
+            data["nextCursor"] = next_cursor
+
+        return set_etag(Response(data), etag)
 
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+    def should_stream(self, limit):
+        threshold = getattr(settings, "ARTICLE_LIST_STREAMING_LIMIT", None)
+        renderer = self.request.accepted_renderer
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"articles": serializer.data, "articlesCount": queryset_count})
+        return (
+            threshold is not None
+            and limit > threshold
+            and isinstance(renderer, JSONRenderer)
+            and renderer.compact
+            and renderer.get_indent(self.request.accepted_media_type, {}) is None
+        )
+
+    def get_streaming_response(self, page_queryset, limit, articles_count, paginated):
+        """Stream the same bytes get() renders, one article at a time.
+
+        Rows are read through a chunked iterator and every article is
+        serialized and rendered on its own, so memory does not grow with the
+        page size. Streamed responses carry no ETag, If-None-Match is still
+        answered.
+        """
+        render = self.request.accepted_renderer.render
+        context = self.get_serializer_context()
+
+        def content():
+            yield b'{"articles":['
+
+            last = next_cursor = None
+            rows = page_queryset.iterator(chunk_size=self.stream_chunk_size)
+
+            for i, article in enumerate(rows):
+                # The extra row of cursor_page() only means there is a next page.
+                if i == limit:
+                    next_cursor = encode_cursor(last)
+                    break
+
+                if i:
+                    yield b","
+                yield render(self.get_serializer(article, context=context).data)
+                last = article
+
+            yield b'],"articlesCount":' + render(articles_count)
+
+            if paginated:
+                # render(None) is empty, like a Response without content.
+                yield b',"nextCursor":' + (render(next_cursor) or b"null")
+
+            yield b"}"
+
+        return StreamingHttpResponse(
+            content(), content_type=self.request.accepted_renderer.media_type
+        )
 
     def post(self, request, *args, **kwargs):
         modified_data = request.data.copy().get("article")
@@ -200,16 +333,63 @@ class ArticleView(CreateAPIView, ListAPIView, GenericAPIView):
         )
 
 
+class ArticleFeedView(ArticleView):
+    permission_classes = (IsAuthenticated,)
+    http_method_names = ["get", "head", "options"]
+
+    def get_feed_queryset(self, ordering):
+        params = self.request.GET
+        feed = get_feed()
+
+        if ordering != ARTICLE_ORDERINGS["-createdAt"]:
+            return feed.get_queryset(self.request.user)
+
+        # Only the rows up to the end of the page have to be read.
+        limit = int(params.get("limit", self.article_limit))
+
+        if "cursor" in params:
+            size, cursor = limit + 1, params["cursor"]
+        else:
+            size, cursor = int(params.get("offset", self.article_offset)) + limit, None
+
+        return feed.get_page_queryset(self.request.user, max(size, 0), cursor)
+
+    def get_queryset(self):
+        ordering = get_article_ordering(self.request.GET)
+        queryset = self.get_feed_queryset(ordering).for_list(self.request.user)
+
+        return queryset.order_by(*ordering)
+
+    def get_articles_count(self):
+        return get_feed().count(self.request.user)
+
+
 class ArticleDetailView(RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticatedOrReadOnly,)
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     lookup_field = "slug"
 
+    def get_queryset(self):
+        if self.request.method == "GET":
+            return Article.objects.for_list(self.request.user)
+
+        return super().get_queryset()
+
     def get(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response({"article": serializer.data})
+        # Cache hits are composed without serializing, the ETag hashes the
+        # composed data.
+        data = get_article_detail(kwargs[self.lookup_field], request.user)
+
+        if data is None:
+            instance = self.get_object()
+            data = self.get_serializer(instance).data
+            set_article_detail(instance, data)
+
+        etag = make_etag(data)
+        response = not_modified(request, etag) or Response({"article": data})
+
+        return set_etag(response, etag)
 
     def put(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -225,23 +405,27 @@ class ArticleDetailView(RetrieveUpdateDestroyAPIView):
 class ArticleFavoriteView(GenericAPIView, RetrieveModelMixin):
     permission_classes = (IsAuthenticated,)
     serializer_class = ArticleSerializer
-    queryset = Article.objects.all()
     lookup_field = "slug"
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context["favorite"] = True
-        return context
+    def get_queryset(self):
+        # The author and the following flag come with the article.
+        return Article.objects.for_list(self.request.user)
+
+    def get_response(self, instance, favorited):
+        context = self.get_serializer_context()
+        context["favorited"] = favorited
+        serializer = self.get_serializer(instance, context=context)
+        return Response({"article": serializer.data})
 
     def post(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response({"article": serializer.data})
+        favorite(request.user, instance)
+        return self.get_response(instance, favorited=True)
 
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response({"article": serializer.data})
+        unfavorite(request.user, instance)
+        return self.get_response(instance, favorited=False)
 
 
 class CommentView(GenericAPIView, CreateModelMixin, ListModelMixin, DestroyModelMixin):
@@ -250,6 +434,8 @@ class CommentView(GenericAPIView, CreateModelMixin, ListModelMixin, DestroyModel
     # queryset = Article.objects.all()
     lookup_field = "id"
 
+    comment_limit = 20
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["slug"] = self.kwargs["slug"]
@@ -258,11 +444,20 @@ class CommentView(GenericAPIView, CreateModelMixin, ListModelMixin, DestroyModel
     def get_queryset(self):
         slug = self.kwargs["slug"]
 
-        article = Article.objects.get(slug=slug)
+        # The article is joined instead of fetched first, an empty result is
+        # told apart from a missing article in get().
+        queryset = Comment.objects.for_list(self.request.user).filter(
+            article__slug=slug
+        )
+
+        return queryset.order_by("createdAt", "id")
 
-        queryset = article.comment_set.all()
+    def check_article_exists(self, comments):
+        if comments:
+            return
 
-        return queryset
+        if not Article.objects.filter(slug=self.kwargs["slug"]).exists():
+            raise NotFound()
 
     def get_object(self):
         return super().get_object()
@@ -283,14 +478,51 @@ class CommentView(GenericAPIView, CreateModelMixin, ListModelMixin, DestroyModel
 
     def get(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        limit = int(request.GET.get("limit", self.comment_limit))
+        cursor = request.GET.get("cursor")
+
+        if cursor is None:
+            page_queryset = queryset
+        else:
+            page_queryset = cursor_page(queryset, cursor, limit, descending=False)
+
+        if has_validators(request):
+            validators = list(page_queryset.values_list(*COMMENT_VALIDATOR_FIELDS))
+            has_next = cursor is not None and len(validators) > limit
+
+            # Without comments the article may be missing, left to the 404.
+            if validators:
+                response = not_modified(
+                    request, make_etag(validators[:limit], has_next)
+                )
+                if response is not None:
+                    return response
+
+        if cursor is None:
+            comments, next_cursor = list(page_queryset), None
+        else:
+            comments, next_cursor = split_page(list(page_queryset), limit)
+
+        self.check_article_exists(comments)
+
+        etag = make_etag(
+            [comment_validator(comment) for comment in comments],
+            next_cursor is not None,
+        )
+        serializer = self.get_serializer(comments, many=True)
+        data = {"comments": serializer.data}
 
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        if cursor is not None:
+            data["nextCursor"] = next_cursor
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"comments": serializer.data})
+        return set_etag(Response(data), etag)
 
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
+
+
+class TagView(APIView):
+    permission_classes = (AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        return Response({"tags": get_popular_tags()})
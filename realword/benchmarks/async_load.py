@@ -0,0 +1,215 @@
+"""Load test the read endpoints under uvicorn with the sync and async views.
+
+Populates a temporary SQLite database, then starts `uvicorn realword.asgi`
+once with ASYNC_READ_VIEWS off and once with it on, and keeps --connections
+keep-alive connections busy for --duration seconds against each path.
+With --logins, that many more connections keep logging in meanwhile, and a
+third run also enables ASYNC_AUTH_VIEWS. Requires uvicorn.
+
+    python benchmarks/async_load.py --connections 200 --duration 10
+    python benchmarks/async_load.py --connections 50 --logins 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(BASE_DIR))
+
+
+def populate(database, users, articles, comments, follows, seed):
+    os.environ["BENCHMARK_DATABASE"] = database
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db.models import Count
+
+    from api.models import User, Article
+    from api.tokens import get_access_token
+    from benchmarks.data import populate as populate_dataset
+
+    call_command("migrate", verbosity=0)
+    populate_dataset(users, articles, comments, follows=follows, seed=seed)
+
+    # The article with the most comments for the comment list.
+    commented = (
+        Article.objects.annotate(count=Count("comment"))
+        .order_by("-count", "pk")
+        .values_list("slug", flat=True)
+        .first()
+    )
+
+    return get_access_token(User.objects.order_by("pk").first()), commented
+
+
+def get_request(path, token):
+    return (
+        f"GET {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Authorization: Token {token}\r\n\r\n"
+    ).encode()
+
+
+def login_request(email):
+    from benchmarks.data import PASSWORD
+
+    body = json.dumps({"user": {"email": email, "password": PASSWORD}}).encode()
+
+    return (
+        b"POST /api/users/login HTTP/1.1\r\nHost: localhost\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+    )
+
+
+async def worker(port, requests, deadline, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    i = 0
+
+    try:
+        while time.perf_counter() < deadline:
+            request = requests[i % len(requests)]
+            i += 1
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            headers = await reader.readuntil(b"\r\n\r\n")
+            status = int(headers.split(b" ", 2)[1])
+            length = next(
+                int(line.split(b":", 1)[1])
+                for line in headers.split(b"\r\n")
+                if line.lower().startswith(b"content-length:")
+            )
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+
+            assert status == 200, (request, status)
+    finally:
+        writer.close()
+
+
+async def load(port, reads, logins, args):
+    latencies, login_latencies = [], []
+    deadline = time.perf_counter() + args.duration
+
+    await asyncio.gather(
+        *(worker(port, reads, deadline, latencies) for _ in range(args.connections)),
+        *(worker(port, logins, deadline, login_latencies) for _ in range(args.logins)),
+    )
+
+    return latencies, login_latencies
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def report(label, latencies, duration):
+    from benchmarks.data import percentile
+
+    print(
+        f"{label:<16} {len(latencies) / duration:8.1f} req/s"
+        f"   p50 {statistics.median(latencies) * 1000:8.2f} ms"
+        f"   p99 {percentile(latencies, 0.99) * 1000:8.2f} ms"
+    )
+
+
+def bench(label, env, port, reads, logins, args):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "realword.asgi:application",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BASE_DIR,
+        env=env,
+    )
+    try:
+        wait_for_port(port)
+        latencies, login_latencies = asyncio.run(load(port, reads, logins, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    report(label, latencies, args.duration)
+
+    if login_latencies:
+        report(f"{label} login", login_latencies, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--follows", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "benchmark.sqlite3")
+        token, commented = populate(
+            database, args.users, args.articles, args.comments, args.follows, args.seed
+        )
+        reads = [
+            get_request(path, token)
+            for path in (
+                "/api/articles",
+                "/api/articles/article-1",
+                "/api/profiles/user1",
+                f"/api/articles/{commented}/comments",
+            )
+        ]
+        logins = [login_request(f"user{i}@example.com") for i in range(args.users)]
+        modes = [("sync", "0", "0"), ("async", "1", "0")]
+
+        if args.logins:
+            modes.append(("async+auth", "1", "1"))
+
+        for label, async_reads, async_auth in modes:
+            env = dict(
+                os.environ,
+                PYTHONPATH=str(BASE_DIR),
+                DJANGO_SETTINGS_MODULE="benchmarks.settings",
+                BENCHMARK_DATABASE=database,
+                ASYNC_READ_VIEWS=async_reads,
+                ASYNC_AUTH_VIEWS=async_auth,
+            )
+            bench(label, env, args.port, reads, logins, args)
+
+
+if __name__ == "__main__":
+    main()
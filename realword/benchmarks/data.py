@@ -0,0 +1,121 @@
+"""The seeded dataset the benchmarks run on, and their latency helper.
+
+Import it once django.setup() has run.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from api.management.commands.import_ndjson import keep_timestamps
+from api.models import (
+    User,
+    Tag,
+    Article,
+    ArticleTag,
+    ArticleFavorited,
+    Comment,
+    FollowingUser,
+)
+
+BATCH_SIZE = 10000
+PASSWORD = "password"
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+TAGS = [f"tag{i}" for i in range(50)]
+
+
+def populate(users, articles=0, comments=0, follows=0, favorites=0, seed=0):
+    """Create `users` users, `articles` articles and `comments` comments
+    spread over them, and `follows` follows and `favorites` favorites per
+    user, all derived from `seed`. Return the user ids in creation order."""
+    rng = random.Random(seed)
+    # One salt for everyone, hashing a password per user would dominate the
+    # setup and make the hashes differ between runs.
+    password = make_password(PASSWORD, salt="benchmark")
+
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"user{i}",
+                username_lookup=f"user{i}",
+                email=f"user{i}@example.com",
+                password=password,
+                bio=f"Bio of user {i}",
+            )
+            for i in range(users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+    with keep_timestamps(Article, Comment):
+        for start in range(0, articles, BATCH_SIZE):
+            Article.objects.bulk_create(
+                Article(
+                    title=f"Article {i}",
+                    slug=f"article-{i}",
+                    description=f"Description of article {i}",
+                    body=" ".join(rng.choices(TAGS, k=200)),
+                    tagList=rng.sample(TAGS, 3),
+                    author_id=rng.choice(user_ids),
+                    createdAt=EPOCH + timedelta(minutes=i),
+                    updatedAt=EPOCH + timedelta(minutes=i),
+                )
+                for i in range(start, min(start + BATCH_SIZE, articles))
+            )
+        article_ids = list(Article.objects.order_by("pk").values_list("pk", flat=True))
+
+        for start in range(0, comments, BATCH_SIZE):
+            Comment.objects.bulk_create(
+                Comment(
+                    body=f"Comment {i}",
+                    article_id=rng.choice(article_ids),
+                    author_id=rng.choice(user_ids),
+                    createdAt=EPOCH + timedelta(minutes=i),
+                    updatedAt=EPOCH + timedelta(minutes=i),
+                )
+                for i in range(start, min(start + BATCH_SIZE, comments))
+            )
+
+    Tag.objects.bulk_create(Tag(name=name) for name in TAGS)
+    tag_ids = dict(Tag.objects.values_list("name", "pk"))
+    ArticleTag.objects.bulk_create(
+        (
+            ArticleTag(article_id=pk, tag_id=tag_ids[name])
+            for pk, tag_list in Article.objects.values_list("pk", "tagList").iterator()
+            for name in tag_list
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    FollowingUser.objects.bulk_create(
+        (
+            FollowingUser(user_id=user_id, following_id=following_id)
+            for user_id in user_ids
+            for following_id in rng.sample(user_ids, min(follows, len(user_ids)))
+            if following_id != user_id
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    ArticleFavorited.objects.bulk_create(
+        (
+            ArticleFavorited(user_id=user_id, article_id=article_id)
+            for user_id in user_ids
+            for article_id in rng.sample(article_ids, min(favorites, len(article_ids)))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    call_command("rebuild_tag_counts", stdout=open(os.devnull, "w"))
+    call_command("reconcile_favorites_count", stdout=open(os.devnull, "w"))
+
+    return user_ids
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
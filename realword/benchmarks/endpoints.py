@@ -0,0 +1,438 @@
+"""Benchmark every route of api/urls.py on a deterministic dataset.
+
+Builds a throwaway test database with --users users, --articles articles,
+--comments comments and --follows follows and --favorites favorites per
+user, all derived from --seed, then sends --requests requests to each
+endpoint through the Django test client, authenticated with a real token
+where the endpoint needs one. Reports p50/p99 latency, queries per request
+and the peak memory allocated per request (measured in a separate
+tracemalloc pass of --alloc-requests requests, which would skew timings).
+
+--save writes the results to a JSON baseline, --compare reports the
+difference to a baseline and exits with status 1 when an endpoint got
+slower than --tolerance or runs more queries. A baseline measured with other
+dataset options is refused (status 2) before anything runs.
+
+    python benchmarks/endpoints.py --save baseline.json
+    python benchmarks/endpoints.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "realword.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_test_environment,
+)
+from rest_framework.test import APIClient  # noqa: E402
+
+from api import urls  # noqa: E402
+from api.models import User, Article, Comment  # noqa: E402
+from api.services import follow, unfollow, favorite, unfavorite  # noqa: E402
+from api.tokens import get_access_token  # noqa: E402
+from benchmarks.data import PASSWORD, TAGS, percentile, populate  # noqa: E402
+
+# Arguments recorded in a baseline, results are only comparable when equal.
+DATASET_ARGS = ("users", "articles", "comments", "follows", "favorites", "seed")
+
+
+class Dataset:
+    """What the endpoints pick their targets from, all chosen by --seed."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.reader = User.objects.order_by("pk").first()
+        self.usernames = list(
+            User.objects.exclude(pk=self.reader.pk)
+            .order_by("pk")
+            .values_list("username", flat=True)
+        )
+        self.slugs = list(Article.objects.order_by("pk").values_list("slug", flat=True))
+        self.own_article = self.create_article("Own article")
+
+    def username(self, i):
+        return self.usernames[i % len(self.usernames)]
+
+    def slug(self, i):
+        return self.slugs[i % len(self.slugs)]
+
+    def random_slug(self):
+        return self.rng.choice(self.slugs)
+
+    def create_article(self, title):
+        return Article.objects.create(
+            title=title, description="description", body="body", author=self.reader
+        )
+
+
+def article_body(i):
+    return {
+        "article": {
+            "title": f"Benchmark {i}",
+            "description": "description",
+            "body": "body",
+            "tagList": ["benchmark"],
+        }
+    }
+
+
+# Follows and favorites are undone or done first, so that every request
+# writes.
+def follow_request(d, i):
+    unfollow(d.reader, User.objects.get(username=d.username(i)))
+
+    return "post", f"/api/profiles/{d.username(i)}/follow", None, True
+
+
+def unfollow_request(d, i):
+    follow(d.reader, User.objects.get(username=d.username(i)))
+
+    return "delete", f"/api/profiles/{d.username(i)}/follow", None, True
+
+
+def favorite_request(d, i):
+    unfavorite(d.reader, Article.objects.get(slug=d.slug(i)))
+
+    return "post", f"/api/articles/{d.slug(i)}/favorite", None, True
+
+
+def unfavorite_request(d, i):
+    favorite(d.reader, Article.objects.get(slug=d.slug(i)))
+
+    return "delete", f"/api/articles/{d.slug(i)}/favorite", None, True
+
+
+# name: (route of api/urls.py, request factory). A factory gets the dataset
+# and the request number and returns (method, path, data, authenticated);
+# it may prepare what the request acts on, that is not timed.
+ENDPOINTS = {
+    "POST /users": (
+        "users",
+        lambda d, i: (
+            "post",
+            "/api/users",
+            {
+                "user": {
+                    "username": f"new{i}",
+                    "email": f"new{i}@example.com",
+                    "password": PASSWORD,
+                }
+            },
+            False,
+        ),
+    ),
+    "POST /users/login": (
+        "users/login",
+        lambda d, i: (
+            "post",
+            "/api/users/login",
+            {"user": {"email": d.reader.email, "password": PASSWORD}},
+            False,
+        ),
+    ),
+    "GET /user": ("user", lambda d, i: ("get", "/api/user", None, True)),
+    "PUT /user": (
+        "user",
+        lambda d, i: ("put", "/api/user", {"user": {"bio": f"Bio {i}"}}, True),
+    ),
+    "GET /profiles/:username": (
+        "profiles/<str:username>",
+        lambda d, i: ("get", f"/api/profiles/{d.username(i)}", None, True),
+    ),
+    "POST /profiles/:username/follow": (
+        "profiles/<str:username>/follow",
+        follow_request,
+    ),
+    "DELETE /profiles/:username/follow": (
+        "profiles/<str:username>/follow",
+        unfollow_request,
+    ),
+    "GET /articles": ("articles", lambda d, i: ("get", "/api/articles", None, True)),
+    "GET /articles?tag": (
+        "articles",
+        lambda d, i: ("get", f"/api/articles?tag={TAGS[i % len(TAGS)]}", None, True),
+    ),
+    "GET /articles?author": (
+        "articles",
+        lambda d, i: ("get", f"/api/articles?author={d.username(i)}", None, True),
+    ),
+    "GET /articles?favorited": (
+        "articles",
+        lambda d, i: ("get", f"/api/articles?favorited={d.username(i)}", None, True),
+    ),
+    "GET /articles?cursor": (
+        "articles",
+        lambda d, i: ("get", "/api/articles?cursor=", None, True),
+    ),
+    "GET /articles?view=summary": (
+        "articles",
+        lambda d, i: ("get", "/api/articles?view=summary", None, True),
+    ),
+    "POST /articles": (
+        "articles",
+        lambda d, i: ("post", "/api/articles", article_body(i), True),
+    ),
+    "GET /articles/feed": (
+        "articles/feed",
+        lambda d, i: ("get", "/api/articles/feed", None, True),
+    ),
+    "GET /articles/:slug": (
+        "articles/<str:slug>",
+        lambda d, i: ("get", f"/api/articles/{d.random_slug()}", None, True),
+    ),
+    "PUT /articles/:slug": (
+        "articles/<str:slug>",
+        lambda d, i: (
+            "put",
+            f"/api/articles/{d.own_article.slug}",
+            {"article": {"description": f"Description {i}"}},
+            True,
+        ),
+    ),
+    "DELETE /articles/:slug": (
+        "articles/<str:slug>",
+        lambda d, i: (
+            "delete",
+            f"/api/articles/{d.create_article(f'Deleted {i}').slug}",
+            None,
+            True,
+        ),
+    ),
+    "POST /articles/:slug/favorite": ("articles/<str:slug>/favorite", favorite_request),
+    "DELETE /articles/:slug/favorite": (
+        "articles/<str:slug>/favorite",
+        unfavorite_request,
+    ),
+    "GET /articles/:slug/comments": (
+        "articles/<str:slug>/comments",
+        lambda d, i: ("get", f"/api/articles/{d.random_slug()}/comments", None, True),
+    ),
+    "POST /articles/:slug/comments": (
+        "articles/<str:slug>/comments",
+        lambda d, i: (
+            "post",
+            f"/api/articles/{d.slug(i)}/comments",
+            {"comment": {"body": f"Comment {i}"}},
+            True,
+        ),
+    ),
+    "DELETE /articles/:slug/comments/:id": (
+        "articles/<str:slug>/comments/<int:id>",
+        lambda d, i: (
+            "delete",
+            "/api/articles/{}/comments/{}".format(
+                d.own_article.slug,
+                Comment.objects.create(
+                    body="body", author=d.reader, article=d.own_article
+                ).pk,
+            ),
+            None,
+            True,
+        ),
+    ),
+    "GET /tags": ("tags", lambda d, i: ("get", "/api/tags", None, False)),
+}
+
+
+def check_coverage():
+    routes = {str(pattern.pattern) for pattern in urls.urlpatterns}
+    missing = routes - {route for route, _ in ENDPOINTS.values()}
+
+    if missing:
+        sys.exit(f"No benchmark for the routes {sorted(missing)}")
+
+
+class Runner:
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.token = get_access_token(dataset.reader)
+        self.count = 0
+
+    def request(self, factory):
+        # Numbers keep growing across endpoints and passes, so every created
+        # user, article or comment is new.
+        self.count += 1
+        method, path, data, authenticated = factory(self.dataset, self.count)
+
+        client = APIClient()
+        if authenticated:
+            client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+
+        return lambda: getattr(client, method)(path, data, format="json")
+
+    def time(self, factory, requests):
+        timings, queries = [], []
+
+        for _ in range(requests):
+            send = self.request(factory)
+
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = send()
+                timings.append(time.perf_counter() - start)
+
+            queries.append(len(captured))
+            assert response.status_code < 400, (response.status_code, response.data)
+
+        return timings, queries
+
+    def allocations(self, factory, requests):
+        peaks = []
+        tracemalloc.start()
+
+        try:
+            for _ in range(requests):
+                send = self.request(factory)
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                send()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        return peaks
+
+
+def run(args):
+    dataset = Dataset(args.seed)
+    runner = Runner(dataset)
+    results = {}
+
+    for name, (route, factory) in ENDPOINTS.items():
+        if args.endpoint and not any(pattern in name for pattern in args.endpoint):
+            continue
+
+        cache.clear()
+        runner.time(factory, args.warmup)
+        timings, queries = runner.time(factory, args.requests)
+        peaks = runner.allocations(factory, args.alloc_requests)
+
+        results[name] = {
+            "p50_ms": round(statistics.median(timings) * 1000, 3),
+            "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+            "queries": round(statistics.mean(queries), 2),
+            "alloc_kib": round(statistics.median(peaks) / 1024, 1) if peaks else None,
+        }
+        print_result(name, results[name])
+
+    return results
+
+
+def print_result(name, result):
+    print(
+        f"{name:<38} p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms"
+        f"   {result['queries']:5.1f} queries   {result['alloc_kib'] or 0:8.1f} KiB"
+    )
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every endpoint against `baseline`, return whether
+    any of them regressed."""
+    regressed = False
+    print(f"\ncompared to {baseline['created']}, tolerance {tolerance:.0%}")
+
+    for name, result in results.items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            print(f"{name:<38} new")
+            continue
+
+        change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+        flags = []
+        if change > tolerance:
+            flags.append("slower")
+        if result["queries"] > before["queries"]:
+            flags.append(f"queries {before['queries']} -> {result['queries']}")
+
+        regressed = regressed or bool(flags)
+        print(f"{name:<38} p50 {change:+7.1%}   {', '.join(flags) or 'ok'}")
+
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--comments", type=int, default=30000)
+    parser.add_argument("--follows", type=int, default=20)
+    parser.add_argument("--favorites", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-requests", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        help="Only run the endpoints whose name contains this, repeatable.",
+    )
+    parser.add_argument("--save", metavar="FILE", help="Write a JSON baseline.")
+    parser.add_argument("--compare", metavar="FILE", help="Compare to a baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    dataset = {name: getattr(args, name) for name in DATASET_ARGS}
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+
+        # Timings of another dataset are not comparable, refuse before
+        # spending the time to measure.
+        if baseline["dataset"] != dataset:
+            options = " ".join(
+                f"--{name} {value}" for name, value in baseline["dataset"].items()
+            )
+            parser.error(
+                f"{args.compare} was measured on another dataset, "
+                f"run with {options} to compare to it"
+            )
+
+    check_coverage()
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        start = time.perf_counter()
+        populate(**{name: getattr(args, name) for name in DATASET_ARGS})
+        print(
+            f"populated {args.users} users, {args.articles} articles, "
+            f"{args.comments} comments in {time.perf_counter() - start:.1f} s\n"
+        )
+
+        results = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.save:
+        saved = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "dataset": dataset,
+            "endpoints": results,
+        }
+        Path(args.save).write_text(json.dumps(saved, indent=2) + "\n")
+
+    if args.compare and compare(results, baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Compare the pull and push strategies of GET /api/articles/feed.
+
+Builds a throwaway test database with --users users, --articles articles
+spread over them and --follows followed authors per user, then reads the
+first feed page of --readers random users with each strategy and times
+publishing an article to the followers of --writers random authors.
+
+    python benchmarks/feed.py --users 10000 --articles 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "realword.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api.feeds import PushFeed  # noqa: E402
+from api.models import User, FollowingUser, Article, TimelineEntry  # noqa: E402
+from benchmarks.data import percentile, populate  # noqa: E402
+
+
+def build_timelines(readers):
+    # Equivalent to what fan-out on write would have left in the readers'
+    # timelines, without fanning out every generated article.
+    feed = PushFeed()
+
+    for user_id in readers:
+        for following_id in FollowingUser.objects.filter(user=user_id).values_list(
+            "following", flat=True
+        ):
+            feed.user_followed(user_id, following_id)
+
+
+def measure(label, samples):
+    print(
+        f"{label:<28} p50 {statistics.median(samples) * 1000:8.2f} ms"
+        f"   p99 {percentile(samples, 0.99) * 1000:8.2f} ms"
+    )
+
+
+def bench_reads(strategy, readers):
+    client = APIClient()
+    timings, queries = [], []
+
+    with override_settings(FEED_STRATEGY=strategy, DEBUG=True):
+        for user in User.objects.filter(pk__in=readers):
+            client.force_authenticate(user)
+            reset_queries()
+
+            start = time.perf_counter()
+            response = client.get("/api/articles/feed")
+            timings.append(time.perf_counter() - start)
+            queries.append(len(connection.queries))
+
+            assert response.status_code == 200, response.status_code
+
+    measure(f"read  {strategy}", timings)
+    print(f"{'':<28} {statistics.mean(queries):.1f} queries per request")
+
+
+def bench_writes(strategy, writers):
+    timings = []
+
+    with override_settings(FEED_STRATEGY=strategy):
+        for i, author_id in enumerate(writers):
+            start = time.perf_counter()
+            Article.objects.create(
+                title=f"Benchmark {strategy} {i}",
+                description="description",
+                body="body",
+                author_id=author_id,
+            )
+            timings.append(time.perf_counter() - start)
+
+    measure(f"write {strategy}", timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--articles", type=int, default=1000000)
+    parser.add_argument("--follows", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=200)
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        start = time.perf_counter()
+        user_ids = populate(
+            args.users, args.articles, follows=args.follows, seed=args.seed
+        )
+        rng = random.Random(args.seed)
+        readers = rng.sample(user_ids, min(args.readers, len(user_ids)))
+        writers = rng.sample(user_ids, min(args.writers, len(user_ids)))
+        build_timelines(readers)
+        print(
+            f"populated {args.users} users, {args.articles} articles, "
+            f"{TimelineEntry.objects.count()} timeline entries "
+            f"in {time.perf_counter() - start:.1f} s\n"
+        )
+
+        for strategy in ("api.feeds.PullFeed", "api.feeds.PushFeed"):
+            bench_reads(strategy, readers)
+        for strategy in ("api.feeds.PullFeed", "api.feeds.PushFeed"):
+            bench_writes(strategy, writers)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Time JSONRenderer against api.renderers.ORJSONRenderer per response size.
+
+Article list responses are built with ArticleSerializer from unsaved
+instances, for each --articles count and --body-size, and rendered with both
+renderers. The outputs are checked to be identical.
+
+    python benchmarks/json_render.py --articles 1 20 100 --body-size 1000 10000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "realword.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from api.models import User, Article  # noqa: E402
+from api.renderers import ORJSONRenderer, orjson  # noqa: E402
+from api.serializers import ArticleSerializer  # noqa: E402
+
+
+def build_response(articles, body_size):
+    # Rendering only needs instances, no database is touched.
+    request = APIRequestFactory().get("/api/articles")
+    request.user = AnonymousUser()
+    author = User(pk=1, username="author", bio="bio", image="")
+    now = timezone.now()
+
+    page = []
+    for i in range(articles):
+        article = Article(
+            pk=i,
+            title=f"Article {i}",
+            slug=f"article-{i}",
+            description="description",
+            body=("Zażółć gęślą jaźń. " * body_size)[:body_size],
+            tagList=["django", "performance"],
+            createdAt=now,
+            updatedAt=now,
+            favorites_count=i,
+            author=author,
+        )
+        article.is_favorited = bool(i % 2)
+        article.is_following_author = False
+        page.append(article)
+
+    serializer = ArticleSerializer(page, many=True, context={"request": request})
+
+    return {"articles": serializer.data, "articlesCount": articles}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, nargs="+", default=[1, 20, 100])
+    parser.add_argument("--body-size", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    if orjson is None:
+        sys.exit("orjson is not installed, ORJSONRenderer would use json")
+
+    renderers = (("json", JSONRenderer()), ("orjson", ORJSONRenderer()))
+
+    for articles in args.articles:
+        for body_size in args.body_size:
+            data = build_response(articles, body_size)
+            outputs = {label: renderer.render(data) for label, renderer in renderers}
+            assert outputs["json"] == outputs["orjson"]
+
+            timings = []
+            for label, renderer in renderers:
+                seconds = timeit.timeit(
+                    lambda: renderer.render(data), number=args.iterations
+                )
+                timings.append(f"{label} {seconds / args.iterations * 1e6:9.1f} us")
+
+            print(
+                f"{articles:4} articles x {body_size:6} chars"
+                f" {len(outputs['json']) / 1024:9.1f} KiB   " + "   ".join(timings)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Measure POST /api/users/login throughput for each password hasher setup.
+
+Every configuration registers a user hashed with it, then logs in
+--logins times from --threads threads. Throughput is reported in total and
+per core used (the hashers release the GIL, so threads scale until they run
+out of cores).
+
+    python benchmarks/login.py --logins 50 --threads 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "realword.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api.models import User  # noqa: E402
+
+CONFIGURATIONS = {
+    "pbkdf2 (default)": {"PASSWORD_HASHERS": ["api.hashers.PBKDF2PasswordHasher"]},
+    "pbkdf2 100k iterations": {
+        "PASSWORD_HASHERS": ["api.hashers.PBKDF2PasswordHasher"],
+        "PASSWORD_HASHER_OPTIONS": {"pbkdf2_sha256": {"iterations": 100000}},
+    },
+    "scrypt (default)": {"PASSWORD_HASHERS": ["api.hashers.ScryptPasswordHasher"]},
+    "scrypt n=2**13": {
+        "PASSWORD_HASHERS": ["api.hashers.ScryptPasswordHasher"],
+        "PASSWORD_HASHER_OPTIONS": {"scrypt": {"work_factor": 2**13}},
+    },
+    "argon2 (default)": {"PASSWORD_HASHERS": ["api.hashers.Argon2PasswordHasher"]},
+    "argon2 t=1 m=64MiB p=1": {
+        "PASSWORD_HASHERS": ["api.hashers.Argon2PasswordHasher"],
+        "PASSWORD_HASHER_OPTIONS": {
+            "argon2": {"time_cost": 1, "memory_cost": 65536, "parallelism": 1}
+        },
+    },
+}
+
+
+def login(email):
+    response = APIClient().post(
+        "/api/users/login",
+        {"user": {"email": email, "password": "benchmark password"}},
+        format="json",
+    )
+    assert response.status_code == 200, response.data
+
+
+def bench(label, overrides, logins, threads):
+    number = User.objects.count()
+    email = f"benchmark{number}@example.com"
+
+    with override_settings(**overrides):
+        try:
+            User.objects.create_user(
+                email=email,
+                password="benchmark password",
+                username=f"benchmark{number}",
+            )
+        except ValueError as e:
+            print(f"{label:<28} skipped: {e}")
+            return
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(login, [email] * logins))
+        seconds = time.perf_counter() - start
+
+    cores = min(threads, os.cpu_count())
+    print(
+        f"{label:<28} {logins / seconds:8.1f} logins/s"
+        f"   {logins / seconds / cores:8.1f} logins/s per core"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for label, overrides in CONFIGURATIONS.items():
+            bench(label, overrides, args.logins, args.threads)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
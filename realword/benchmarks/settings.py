@@ -0,0 +1,18 @@
+"""Settings for benchmark servers started by the scripts in this directory.
+
+The database, ASYNC_READ_VIEWS and ASYNC_AUTH_VIEWS come from the environment,
+so the same data can be served in every mode.
+"""
+
+import os
+
+from realword.settings import *  # noqa: F401, F403
+from realword.settings import DATABASES
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+
+DATABASES["default"]["NAME"] = os.environ["BENCHMARK_DATABASE"]
+
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS") == "1"
+ASYNC_AUTH_VIEWS = os.environ.get("ASYNC_AUTH_VIEWS") == "1"
@@ -0,0 +1,62 @@
+"""Time UserSerializer renders with the old and the cached token issuance.
+
+"before" signs a refresh and an access token on every render like the
+original get_tokens_for_user(), "after" goes through api.tokens. The token
+field alone is timed as well since building the serializer's fields is a
+fixed cost shared by both.
+
+    python benchmarks/user_token.py --iterations 10000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "realword.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from api.models import User  # noqa: E402
+from api.serializers import UserSerializer  # noqa: E402
+
+
+class BeforeUserSerializer(UserSerializer):
+    def user_token(self, user):
+        refresh = RefreshToken.for_user(user)
+
+        return {"refresh": str(refresh), "access": str(refresh.access_token)}["access"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Rendering only needs an instance, no database is touched.
+    user = User(pk=1, username="user", email="user@example.com", password="!")
+
+    for label, serializer_class in (
+        ("before", BeforeUserSerializer),
+        ("after", UserSerializer),
+    ):
+        render = timeit.timeit(
+            lambda: serializer_class(user).data, number=args.iterations
+        )
+        token = timeit.timeit(
+            lambda: serializer_class().user_token(user), number=args.iterations
+        )
+        print(
+            f"{label:<8} {render / args.iterations * 1e6:8.1f} us per render"
+            f"   {token / args.iterations * 1e6:8.1f} us per token"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -31,17 +31,100 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# The JSON renderer and parser are orjson backed drop-ins for DRF's, with
+# the same output; without the orjson package they use the stdlib json.
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "api.authentication.StatelessJWTAuthentication",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# How long a deactivated user can keep using already issued access tokens on
+# another process (see api.authentication.InactiveUsers).
+STATELESS_AUTH_DENYLIST_TIMEOUT = 30
+
+# Serve GET requests of the article list/detail, profile and comment list
+# endpoints with the async views in api.async_views. Only worth it when
+# running under ASGI (realword.asgi), under WSGI they add a sync/async hop.
+ASYNC_READ_VIEWS = False
+
+# Serve POST requests of the login and registration endpoints with the async
+# views in api.async_views, which hash passwords off the event loop and off
+# the thread the sync views share under ASGI.
+ASYNC_AUTH_VIEWS = False
+
+# Number of users whose last access token is kept for reuse (api.tokens).
+ACCESS_TOKEN_CACHE_SIZE = 1024
+
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Token",),
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
 }
 
+# Article list counts are cached per filter and invalidated on writes, the
+# timeout bounds staleness with per-process caches. Above the threshold the
+# database's row estimate is returned instead (PostgreSQL only).
+ARTICLES_COUNT_CACHE_TIMEOUT = 60
+ARTICLES_COUNT_APPROXIMATE_THRESHOLD = None
+
+# GET /api/articles/<slug> caches the viewer independent part of the article
+# in the default cache, invalidated on article, author and favorite writes.
+ARTICLE_DETAIL_CACHE_TIMEOUT = 300
+
+# Public profiles (username, bio, image) are read through the default cache
+# by username, invalidated when the user updates themselves.
+PROFILE_CACHE_TIMEOUT = 300
+
+# Article lists requested with a larger limit are streamed one article at a
+# time, None never streams.
+ARTICLE_LIST_STREAMING_LIMIT = 100
+
+# Responses are compressed with brotli (requires the brotli package) or gzip,
+# as negotiated with Accept-Encoding.
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Fraction of requests profiled by RequestProfilingMiddleware (query count,
+# database time, duplicate queries, auth, serializer and render time), which
+# logs a JSON line to api.profiling. 0 is off.
+REQUEST_PROFILING_SAMPLE_RATE = 0
+
+# Also add the profile as a Server-Timing header, only to the responses of
+# requests coming from INTERNAL_IPS.
+REQUEST_PROFILING_SERVER_TIMING = False
+INTERNAL_IPS = []
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "api.profiling": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+# GET /api/tags serves the most used tags from a per-process cache.
+POPULAR_TAGS_LIMIT = 20
+POPULAR_TAGS_CACHE_TIMEOUT = 60
+
+# GET /api/articles/feed strategy: api.feeds.PullFeed reads followed authors'
+# articles at request time, api.feeds.PushFeed fans new articles out to
+# per-user timelines capped at FEED_TIMELINE_CAP entries, except for articles
+# written while their author has more than FEED_FANOUT_MAX_FOLLOWERS
+# followers, which are pulled.
+# With PushFeed, run the trim_timelines command periodically to apply the cap.
+FEED_STRATEGY = "api.feeds.PullFeed"
+FEED_TIMELINE_CAP = 1000
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -55,6 +138,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.RequestProfilingMiddleware",
+    "api.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -91,6 +176,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # A file rather than SQLite's default in-memory test database, so that
+        # tests can use several connections at once.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -113,6 +201,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords, the others verify existing hashes
+# which are upgraded on the next login. Swap scrypt or argon2 (requires the
+# argon2-cffi package) to the top to change the algorithm.
+PASSWORD_HASHERS = [
+    "api.hashers.PBKDF2PasswordHasher",
+    "api.hashers.ScryptPasswordHasher",
+    "api.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
+# Cost parameters per algorithm for the api.hashers hashers, e.g.
+# {"pbkdf2_sha256": {"iterations": 600000},
+#  "scrypt": {"work_factor": 2**14, "block_size": 8, "parallelism": 1},
+#  "argon2": {"time_cost": 2, "memory_cost": 102400, "parallelism": 8}}
+PASSWORD_HASHER_OPTIONS = {}
+
+# Size of the thread pool the async login and registration views hash
+# passwords on, None uses the event loop's default executor.
+PASSWORD_HASHING_WORKERS = None
+
 AUTH_USER_MODEL = "api.User"
 
 # Internationalization